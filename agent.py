@@ -5,10 +5,8 @@ This module defines the state and the nodes for the LangGraph workflow, includin
 planning, extracting ingredients, and shopping.
 """
 
-import json
-import os
 import re
-from operator import add
+import time
 from typing import Annotated, List, TypedDict
 
 import streamlit as st
@@ -16,17 +14,30 @@ from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_google_genai import ChatGoogleGenerativeAI
 
+import jsonx
 from config import EXTRACTOR_MODEL, PLANNER_MODEL, SHOPPER_MODEL
 from database import db
 from prompts import EXTRACTOR_SYSTEM_PROMPT, PLANNER_SYSTEM_PROMPT
 
+# Minimum seconds between shopper UI updates; each one is a websocket message
+PROGRESS_INTERVAL = 0.25
+STATUS_FLUSH_INTERVAL = 0.5
+
+# Chat history kept in graph state; older messages are dropped from checkpoints
+MAX_MESSAGES = 10
+
+
+def add_capped(left: List[BaseMessage], right: List[BaseMessage]) -> List[BaseMessage]:
+    """Append new messages, keeping only the most recent MAX_MESSAGES."""
+    return (left + right)[-MAX_MESSAGES:]
+
 
 class AgentState(TypedDict):
     """
     State definition for the agent workflow.
 
     Attributes:
-        messages (List[BaseMessage]): Chat history.
+        messages (List[BaseMessage]): Chat history (last MAX_MESSAGES only).
         meal_plan_json (str): Generated meal plan in JSON format.
         shopping_list (List[str]): List of ingredients to buy.
         cart_items (List[str]): Items successfully added to the cart.
@@ -37,7 +48,7 @@ class AgentState(TypedDict):
         pantry_items (str): User's pantry items to exclude.
     """
 
-    messages: Annotated[List[BaseMessage], add]
+    messages: Annotated[List[BaseMessage], add_capped]
     meal_plan_json: str
     shopping_list: List[str]
     cart_items: List[str]
@@ -65,7 +76,7 @@ async def planner_node(state: AgentState):
         llm = ChatGoogleGenerativeAI(
             model=PLANNER_MODEL,
             temperature=2.0,
-            google_api_key=os.getenv("GOOGLE_API_KEY"),
+            google_api_key=st.session_state.api_key,
         )
         # Meal Planner Prompt
         prompt = ChatPromptTemplate.from_messages(
@@ -85,10 +96,10 @@ async def planner_node(state: AgentState):
             content = re.sub(
                 r"^```json|```$", "", response.content.strip(), flags=re.MULTILINE
             ).strip()
-            json.loads(content)
+            jsonx.loads(content)
             plan_json_str = content
-        except (json.JSONDecodeError, TypeError):
-            plan_json_str = json.dumps({"schedule": []})
+        except (jsonx.JSONDecodeError, TypeError):
+            plan_json_str = jsonx.dumps({"schedule": []})
 
         status.write("Plan created.")
     return {"meal_plan_json": plan_json_str, "total_cost": 0.0}
@@ -108,7 +119,7 @@ async def extractor_node(state: AgentState):
         llm = ChatGoogleGenerativeAI(
             model=EXTRACTOR_MODEL,
             temperature=0,
-            google_api_key=os.getenv("GOOGLE_API_KEY"),
+            google_api_key=st.session_state.api_key,
         )
 
         past_buys = db.get_all_past_items()
@@ -131,12 +142,8 @@ async def extractor_node(state: AgentState):
             }
         )
 
-        raw_list = response.content.split(",")
-        items = []
-        for i in raw_list:
-            clean = re.sub(r"\s+", " ", i).strip()
-            if clean:
-                items.append(clean)
+        # Collapse internal whitespace runs and drop empty entries
+        items = [" ".join(p.split()) for p in response.content.split(",") if p.strip()]
 
         status.write(f"Identified {len(items)} items.")
     return {"shopping_list": items}
@@ -146,12 +153,21 @@ async def shopper_node(state: AgentState):
     """
     Execute the shopping process using the browser tool.
 
+    The browser is shared by every session, so runs from other sessions wait
+    on its lock; their planning and LLM calls are not held up.
+
     Args:
         state (AgentState): The current agent state.
 
     Returns:
         dict: Updates to the state (cart_items, missing_items, total_cost).
     """
+    async with st.session_state.browser_tool.lock:
+        return await _shop(state)
+
+
+async def _shop(state: AgentState):
+    """Run the shopper with the browser lock held; see shopper_node."""
     shopping_list = state["shopping_list"]
     current_total = state.get("total_cost", 0.0)
     limit = state.get("budget_limit", 200.0)
@@ -161,7 +177,7 @@ async def shopper_node(state: AgentState):
     llm = ChatGoogleGenerativeAI(
         model=SHOPPER_MODEL,
         temperature=0,
-        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        google_api_key=st.session_state.api_key,
     )
     browser_tool = st.session_state.browser_tool
 
@@ -177,19 +193,32 @@ async def shopper_node(state: AgentState):
         "Remove specific quantities (like '2 cups', '1 lb') unless it's a standard pack size (like '12 pack').\n"
         "Keep brand names if specified. Keep dietary types (e.g. 'Gluten Free').\n"
         "Return a JSON object with a key 'queries' which is a list of strings corresponding to the input list.\n\n"
-        f"Input List: {json.dumps(shopping_list)}"
+        f"Input List: {jsonx.dumps(shopping_list)}"
     )
     try:
         q_response = await llm.ainvoke([HumanMessage(content=query_prompt)])
         content = re.sub(r"^```json|```$", "", q_response.content.strip(), flags=re.MULTILINE).strip()
-        optimized_queries = json.loads(content)["queries"]
+        optimized_queries = jsonx.loads(content)["queries"]
     except Exception:
         optimized_queries = shopping_list # Fallback
 
     progress_bar = status_container.progress(0)
+    last_progress_ts = last_flush_ts = 0.0
+    pending_lines = []
+    retries = []  # Failed smart adds, retried together in parallel tabs
 
     for i, (original_item, search_term) in enumerate(zip(shopping_list, optimized_queries)):
-        status_container.write(f"Looking for: **{original_item}** (Query: *{search_term}*)")
+        # Throttle UI chatter: batch status lines and rate-limit the progress bar
+        now = time.monotonic()
+        pending_lines.append(f"Looking for: **{original_item}** (Query: *{search_term}*)")
+        if now - last_flush_ts >= STATUS_FLUSH_INTERVAL:
+            status_container.write("  \n".join(pending_lines))
+            pending_lines.clear()
+            last_flush_ts = now
+        if now - last_progress_ts >= PROGRESS_INTERVAL:
+            progress_bar.progress(i / len(shopping_list))
+            last_progress_ts = now
+
         if current_total >= limit:
             missing.append(f"{original_item} (Budget Cut)")
             continue
@@ -240,17 +269,26 @@ async def shopper_node(state: AgentState):
                 current_total += chosen['price']
             else:
                 st.toast(f"Smart add failed for {original_item}. Retrying...")
-                bf_result = await browser_tool.search_and_add(search_term)
-                if bf_result["status"] == "ADDED":
-                    cart.append(f"{original_item} (${bf_result['price']:.2f})")
-                    current_total += bf_result["price"]
-                else:
-                    missing.append(original_item)
+                retries.append((original_item, search_term))
         else:
             missing.append(f"{original_item} (No good match)")
 
-        progress_bar.progress((i + 1) / len(shopping_list))
-
+    if pending_lines:
+        status_container.write("  \n".join(pending_lines))
+    if retries:
+        status_container.write(f"🔁 Retrying {len(retries)} item(s)...")
+        bf_results = await browser_tool.search_and_add_many(
+            [term for _, term in retries], budget=limit - current_total
+        )
+        for (original_item, _), bf_result in zip(retries, bf_results):
+            if bf_result["status"] == "ADDED":
+                cart.append(f"{original_item} (${bf_result['price']:.2f})")
+                current_total += bf_result["price"]
+            elif bf_result["status"] == "BUDGET":
+                missing.append(f"{original_item} (Budget Cut)")
+            else:
+                missing.append(original_item)
+    progress_bar.progress(1.0)
     status_container.write("🚚 Initializing Checkout...")
     await browser_tool.trigger_checkout()
     status_container.update(
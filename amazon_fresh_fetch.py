@@ -6,94 +6,110 @@ and the browser automation tool. It handles the UI for meal planning, shopping l
 review, and checkout handoff.
 """
 
-import asyncio
-import json
-import os
-from pathlib import Path
+import time
+import uuid
 
-import pandas as pd
 import streamlit as st
-from dotenv import load_dotenv
-from langchain_core.messages import HumanMessage
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.graph import END, StateGraph
-
-# Load environment variables from .env file
-load_dotenv()
-
-# ==========================================
-# 1. CREDENTIAL CHECK
-# ==========================================
-def get_api_key():
-    """Get API key from Environment OR Sidebar"""
-    api_key = os.getenv("GOOGLE_API_KEY")
-    
-    if not api_key:
-        # If no .env file, show an input box in the sidebar
-        with st.sidebar:
-            st.divider()
-            st.warning("🔑 API Key Required")
-            api_key = st.text_input(
-                "Enter Gemini API Key:", 
-                type="password", 
-                help="Get one at aistudio.google.com"
-            )
-            if api_key:
-                os.environ["GOOGLE_API_KEY"] = api_key # Set for this session
-                st.success("Key Accepted!")
-                st.rerun() # Rerun to ensure key is picked up
-            else:
-                st.stop() # Stop execution until key is provided
-    return api_key
-
-# Call this early in your script
-GOOGLE_API_KEY = get_api_key()
 
 from config import (
+    DB_MAINTENANCE_INTERVAL,
     PAGE_ICON,
     PAGE_TITLE,
 )
-from database import db
-from pdf_generator import generate_pdf
-from prompts import DEFAULT_PROMPT
-from ui import STREAMLIT_STYLE, render_plan_ui
-from utils import get_api_key
-from workflow import init_session_state
+from utils import get_api_key, load_env, run_async
 
 # ==========================================
-# 1. CREDENTIAL CHECK
+# STREAMLIT UI SETUP
 # ==========================================
-# Call this early in your script
-GOOGLE_API_KEY = get_api_key()
+
+# Must be the first Streamlit command of the run
+st.set_page_config(page_title=PAGE_TITLE, page_icon=PAGE_ICON, layout="wide")
 
 # ==========================================
-# STREAMLIT UI SETUP
+# 1. CREDENTIAL CHECK
 # ==========================================
+# Load environment variables from .env file (once per process)
+load_env()
+# Stops the run here until a key is available; agents read st.session_state.api_key
+get_api_key()
 
-st.set_page_config(page_title=PAGE_TITLE, page_icon=PAGE_ICON, layout="wide")
+import pandas as pd
+from langchain_core.messages import HumanMessage
 
-st.markdown(
-    STREAMLIT_STYLE,
-    unsafe_allow_html=True,
-)
+from database import db
+from pdf_generator import generate_pdf
+from prompts import DEFAULT_PROMPT
+from ui import STREAMLIT_STYLE, render_plan_ui
+from workflow import get_graph_app, init_session_state
+
+# Must be emitted on every rerun: Streamlit drops elements a rerun doesn't
+# re-send. st.html skips markdown parsing for this style-only block.
+st.html(STREAMLIT_STYLE)
 
 # INIT GRAPH
 init_session_state()
 
-app = st.session_state.graph_app
+app = get_graph_app()
+
+# DB MAINTENANCE (checkpoint WAL + incremental vacuum, at most once per interval)
+if time.time() - st.session_state.get("last_db_maintenance", 0.0) > DB_MAINTENANCE_INTERVAL:
+    db.maintenance()
+    st.session_state.last_db_maintenance = time.time()
+
+
+# CACHED DB READS (cleared on every write below)
+@st.cache_data(ttl=300)
+def load_settings():
+    """Read all sidebar settings in one query, served from memory between reruns."""
+    return db.get_settings({"budget": "200.0", "pantry": ""})
+
+
+@st.cache_data(ttl=60)
+def cached_recent_plans():
+    """Read the recent plans, served from memory between reruns."""
+    return db.get_recent_plans()
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_pdf(plan_json, items):
+    """Build the plan PDF once per (plan, item tuple) pair."""
+    return generate_pdf(plan_json, list(items))
+
+
+# GRAPH STATE (re-read from the checkpointer only after this session writes it)
+def load_snapshot(config):
+    """Return the graph snapshot for config, cached in session_state between reruns."""
+    thread_id = config["configurable"]["thread_id"]
+    cached = st.session_state.get("snapshot")
+    if cached is None or cached[0] != thread_id:
+        cached = st.session_state.snapshot = (thread_id, app.get_state(config))
+    return cached[1]
+
+
+def invalidate_snapshot():
+    """Drop the cached snapshot after a graph run or state update."""
+    st.session_state.pop("snapshot", None)
+
 
 # SIDEBAR
-with st.sidebar:
+@st.fragment
+def render_sidebar():
+    """
+    Render settings and history. Edits here rerun only this fragment.
+
+    Returns:
+        tuple: The current (budget, pantry) widget values.
+    """
     st.header("⚙️ Settings")
+    settings = load_settings()
     budget = st.number_input(
-        "Weekly Budget ($)", value=float(db.get_setting("budget", "200.0")), step=10.0
+        "Weekly Budget ($)", value=float(settings["budget"]), step=10.0
     )
-    pantry_val = db.get_setting("pantry", "")
-    pantry = st.text_area("In Your Pantry", pantry_val)
+    pantry = st.text_area("In Your Pantry", settings["pantry"])
 
     if st.button("Save Settings"):
-        db.save_setting("budget", str(budget))
-        db.save_setting("pantry", pantry)
+        db.save_settings({"budget": str(budget), "pantry": pantry})
+        load_settings.clear()
         st.success("Saved!")
 
     st.divider()
@@ -101,34 +117,123 @@ with st.sidebar:
 
     if st.button("🗑️ Clear History"):
         db.delete_all_plans()
+        cached_recent_plans.clear()
         st.session_state.pop("history_view", None)
         st.rerun()
 
-    past_plans = db.get_recent_plans()
-    for p in past_plans:
-        col1, col2 = st.columns([4, 1])
-        with col1:
-            if st.button(f"{p['date']} - {len(p['list'])} items", key=f"hist_{p['id']}"):
-                st.session_state.history_view = p
-                st.rerun()
-        with col2:
-            if st.button("🗑️", key=f"del_{p['id']}", help="Delete this plan"):
-                db.delete_plan(p['id'])
-                if "history_view" in st.session_state and st.session_state.history_view['id'] == p['id']:
-                    del st.session_state.history_view
-                st.rerun()
+    # One picker plus two buttons, however many plans there are
+    past_plans = cached_recent_plans()
+    if past_plans:
+        with st.expander(f"Past Plans ({len(past_plans)})"):
+            p = st.selectbox(
+                "Pick a plan",
+                past_plans,
+                format_func=lambda p: f"{p['date']} - {len(p['list'])} items",
+                key="hist_pick",
+            )
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("📂 Load", width="stretch"):
+                    st.session_state.history_view = p
+                    st.rerun()
+            with col2:
+                if st.button("🗑️ Delete", width="stretch", help="Delete this plan"):
+                    db.delete_plan(p['id'])
+                    cached_recent_plans.clear()
+                    if "history_view" in st.session_state and st.session_state.history_view['id'] == p['id']:
+                        del st.session_state.history_view
+                    st.rerun()
+
+    return budget, pantry
+
+
+with st.sidebar:
+    budget, pantry = render_sidebar()
+
+
+# SHOPPING LIST REVIEW
+@st.fragment
+def render_cart_editor(data, config, user_prompt):
+    """
+    Render the editable shopping list, PDF download and Shop button.
+
+    Toggling items reruns only this fragment, not the whole page.
+
+    Args:
+        data (dict): The graph state values.
+        config (dict): The run config for the current thread.
+        user_prompt (str): The meal prompt to store with the plan.
+    """
+    c_head, c_pdf = st.columns([3, 1])
+    with c_head:
+        st.subheader("🛒 Confirm Ingredients")
+
+    # Build the editable frame once per shopping list; reruns reuse it so the
+    # keyed editor diffs against the same object
+    raw_list = data.get("shopping_list", [])
+    df_key = f"cart_df_{st.session_state.thread_id}"
+    editor_key = f"editor_{st.session_state.thread_id}"
+    if st.session_state.get(df_key, (None,))[0] != raw_list:
+        st.session_state[df_key] = (raw_list, pd.DataFrame({"Item": raw_list, "Buy": True}))
+        st.session_state.pop(editor_key, None)
+
+    edited_df = st.data_editor(
+        st.session_state[df_key][1], num_rows="dynamic", width="stretch", key=editor_key
+    )
+    # Rows added in the editor start with Buy=None, which the bool cast treats as False
+    buy_mask = edited_df["Buy"].to_numpy(dtype=bool)
+    final_list = edited_df["Item"].to_numpy()[buy_mask].tolist()
+
+    with c_pdf:
+        # The PDF is only built when the button is clicked
+        final_items = tuple(final_list)
+        st.download_button(
+            label="📄 Download PDF Plan",
+            data=lambda: cached_pdf(data["meal_plan_json"], final_items),
+            file_name="plan.pdf",
+            mime="application/pdf",
+            use_container_width=True,
+        )
+
+    if st.button(f"✅ Shop for {len(final_list)} Items", type="primary"):
+        db.save_plan(user_prompt, data["meal_plan_json"], final_list)
+        cached_recent_plans.clear()
+        # Reinforce that we are at the end of extractor, ready for shopper
+        app.update_state(config, {"shopping_list": final_list}, as_node="extractor")
+        invalidate_snapshot()
+
+        progress = st.empty()
+
+        async def resume():
+            """Resume the agent workflow from the current state."""
+            # Force a None input to signal resumption
+            async for event in app.astream(None, config, durability="exit"):
+                for node in event:
+                    if not node.startswith("__"):
+                        progress.caption(f"✅ {node.title()} finished")
+
+        try:
+            run_async(resume())
+            # Clear the manual override so future runs follow the graph
+            if "manual_step_override" in st.session_state:
+                del st.session_state.manual_step_override
+            st.rerun()
+        except Exception as e:
+            st.error(f"Shopping Error: {e}")
+
 
 st.title(f"{PAGE_ICON} {PAGE_TITLE} AI Agent")
 
 # --- WEEKLY MEAL PLAN PROMPT ---
 
-if "thread_id" not in st.session_state:
-    st.session_state.thread_id = "streamlit_run_final"
+# One graph thread per browser session; the compiled graph and its on-disk
+# checkpointer are shared by every session in the process
+st.session_state.setdefault("thread_id", f"session_{uuid.uuid4().hex}")
+config = {"configurable": {"thread_id": st.session_state.thread_id}}
 
 user_prompt = st.text_area("Meal Prompt", value=DEFAULT_PROMPT, height=200)
 
 if st.button("📝 Generate Plan", type="primary"):
-    config = {"configurable": {"thread_id": st.session_state.thread_id}}
     initial_state = {
         "messages": [HumanMessage(content=user_prompt)],
         "budget_limit": budget,
@@ -136,18 +241,24 @@ if st.button("📝 Generate Plan", type="primary"):
         "total_cost": 0.0,
     }
 
+    progress = st.empty()
+
     async def run_to_planning():
         """Run the agent workflow until the planning stage is complete."""
-        async for _ in app.astream(initial_state, config):
-            pass
+        async for event in app.astream(initial_state, config, durability="exit"):
+            for node in event:
+                if not node.startswith("__"):
+                    progress.caption(f"✅ {node.title()} finished")
 
-    asyncio.run(run_to_planning())
-    st.rerun()
+    try:
+        run_async(run_to_planning())
+    finally:
+        invalidate_snapshot()
+    # No rerun needed: the review phase below reads the fresh snapshot
 
-# STATE HANDLING
-config = {"configurable": {"thread_id": st.session_state.thread_id}}
+# STATE HANDLING (snapshot is reused below and across reruns until invalidated)
 try:
-    snapshot = app.get_state(config)
+    snapshot = load_snapshot(config)
     # Check for manual override (used for Reorder)
     if "manual_step_override" in st.session_state:
         current_step = st.session_state.pop("manual_step_override")
@@ -156,9 +267,6 @@ try:
 except Exception:
     current_step = None
 
-except Exception:
-    current_step = None
-
 
 # --- CHECK VIEW MODE (HISTORY vs NEW) ---
 if "history_view" in st.session_state:
@@ -171,23 +279,20 @@ if "history_view" in st.session_state:
     st.divider()
     st.subheader("🛒 Historic Shopping List")
     
-    try:
-        pdf_bytes = generate_pdf(h_data["json"], h_data["list"])
-        st.download_button(
-            label="📄 Download PDF Plan",
-            data=pdf_bytes,
-            file_name=f"plan_{h_data['date'].replace(' ', '_').replace(':', '-')}.pdf",
-            mime="application/pdf",
-            use_container_width=True,
-        )
-    except Exception as e:
-        st.error(f"PDF Error: {e}")
+    # The PDF is only built when the button is clicked
+    history_items = tuple(h_data["list"])
+    st.download_button(
+        label="📄 Download PDF Plan",
+        data=lambda: cached_pdf(h_data["json"], history_items),
+        file_name=f"plan_{h_data['date'].replace(' ', '_').replace(':', '-')}.pdf",
+        mime="application/pdf",
+        use_container_width=True,
+    )
 
     col_h1, col_h2 = st.columns([1, 4])
     with col_h1:
         if st.button("🔄 Reorder", type="primary", help="Load this plan to shop again"):
             # 1. Create a NEW thread ID to start fresh
-            import uuid
             new_thread_id = f"reorder_{uuid.uuid4().hex[:8]}"
             st.session_state.thread_id = new_thread_id
             
@@ -207,6 +312,7 @@ if "history_view" in st.session_state:
             # This places the graph at the edge: extractor -> shopper
             # Since interrupt_before=["shopper"], it should pause there.
             app.update_state(new_config, new_state, as_node="extractor")
+            invalidate_snapshot()
             
             # Force the UI to show the shopper step on next run
             st.session_state.manual_step_override = "shopper"
@@ -224,49 +330,8 @@ elif current_step == "shopper":
     render_plan_ui(data["meal_plan_json"])
 
     st.divider()
-    c_head, c_pdf = st.columns([3, 1])
-    with c_head:
-        st.subheader("🛒 Confirm Ingredients")
-
-    raw_list = data.get("shopping_list", [])
-    df = pd.DataFrame({"Item": raw_list, "Buy": [True] * len(raw_list)})
-
-    edited_df = st.data_editor(df, num_rows="dynamic", width="stretch")
-    final_list = edited_df[edited_df["Buy"] == True]["Item"].tolist()
+    render_cart_editor(data, config, user_prompt)
 
-    with c_pdf:
-        try:
-            pdf_bytes = generate_pdf(data["meal_plan_json"], final_list)
-            st.download_button(
-                label="📄 Download PDF Plan",
-                data=pdf_bytes,
-                file_name="plan.pdf",
-                mime="application/pdf",
-                use_container_width=True,
-            )
-        except Exception as e:
-            st.error(f"PDF Error: {e}")
-
-    if st.button(f"✅ Shop for {len(final_list)} Items", type="primary"):
-        db.save_plan(user_prompt, data["meal_plan_json"], final_list)
-        # Reinforce that we are at the end of extractor, ready for shopper
-        app.update_state(config, {"shopping_list": final_list}, as_node="extractor")
-
-        async def resume():
-            """Resume the agent workflow from the current state."""
-            # Force a None input to signal resumption
-            async for event in app.astream(None, config):
-                pass
-
-        try:
-            asyncio.run(resume())
-            # Clear the manual override so future runs follow the graph
-            if "manual_step_override" in st.session_state:
-                del st.session_state.manual_step_override
-            st.rerun()
-        except Exception as e:
-            st.error(f"Shopping Error: {e}")
-        
 # --- HANDOFF PHASE ===
 elif current_step == "checkout":
     st.divider()
@@ -282,15 +347,12 @@ elif current_step == "checkout":
     rate = int((cart_c / total) * 100) if total > 0 else 0
     c3.metric("Success Rate", f"{rate}%")
 
+    # Static read-only lists: st.table skips the interactive grid component
     col_a, col_b = st.columns(2)
     with col_a:
         st.success(f"✅ **Added ({cart_c})**")
         if cart_c > 0:
-            st.dataframe(
-                pd.DataFrame(data.get("cart_items", []), columns=["Item"]),
-                width="stretch",
-                hide_index=True,
-            )
+            st.table({"Item": data.get("cart_items", [])})
         else:
             st.write("None.")
 
@@ -298,11 +360,7 @@ elif current_step == "checkout":
         st.error(f"❌ **Missed ({miss_c})**")
         if miss_c > 0:
             st.warning("⚠️ Check these manually.")
-            st.dataframe(
-                pd.DataFrame(data.get("missing_items", []), columns=["Item"]),
-                width="stretch",
-                hide_index=True,
-            )
+            st.table({"Item": data.get("missing_items", [])})
         else:
             st.write("None.")
 
@@ -311,4 +369,4 @@ elif current_step == "checkout":
         "👋 **Manual Handoff:** Please complete payment in the open browser window."
     )
     if st.button("Close"):
-        asyncio.run(st.session_state.browser_tool.close())
+        run_async(st.session_state.browser_tool.close())
@@ -7,12 +7,60 @@ including searching for items, adding them to the cart, and initiating checkout.
 
 import asyncio
 import os
-from typing import Dict, List
+import re
+import subprocess
+import sys
+from typing import Dict, List, Optional
 
 import streamlit as st
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from playwright.async_api import async_playwright
 
-from config import SESSION_FILE
+import jsonx
+from config import ADD_TO_CART_TIMEOUT, LOGIN_TIMEOUT, SEARCH_CONCURRENCY, SESSION_FILE
+
+FRESH_URL = "https://www.amazon.com/alm/storefront?almBrandId=QW1hem9uIEZyZXNo"
+SEARCH_BOX_SELECTOR = 'input[id="twotabsearchtextbox"]'
+RESULT_SELECTOR = 'div[data-component-type="s-search-result"]'
+
+# First number in a price string, thousands separators allowed ("$1,234.56")
+_PRICE_RE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+def _parse_price(text: str) -> float:
+    """
+    Parse the amount out of a price string.
+
+    Args:
+        text (str): Price text such as "$1,234.56".
+
+    Returns:
+        float: The amount, or 0.0 if the text holds no number.
+    """
+    match = _PRICE_RE.search(text or "")
+    return float(match.group().replace(",", "")) if match else 0.0
+
+
+# Reads a result card's price and whether it has an add-to-cart button in one
+# round trip instead of a locator query per field.
+CARD_PROBE_JS = """e => ({
+    price: e.querySelector('.a-price .a-offscreen')?.textContent || '',
+    hasBtn: !!e.querySelector("button[name='submit.addToCart'], input[name='submit.addToCart']")
+        || Array.from(e.querySelectorAll('button')).some(
+            b => /add to cart/i.test(b.getAttribute('aria-label') || b.textContent || '')
+        ),
+})"""
+
+# Reads everything search_and_get_options shows the shopper LLM for the top
+# result cards in one round trip.
+OPTIONS_PROBE_JS = """([selector, limit]) => Array.from(
+    document.querySelectorAll(selector)
+).slice(0, limit).map(e => ({
+    title: e.querySelector('h2')?.textContent ?? null,
+    price: e.querySelector('.a-price .a-offscreen')?.textContent ?? '0.00',
+    rating: e.querySelector('i.a-icon-star-small span.a-icon-alt')?.textContent ?? 'N/A',
+    reviews: e.querySelector('span.a-size-base.s-underline-text')?.textContent ?? '0',
+}))"""
 
 
 class AmazonFreshBrowser:
@@ -23,8 +71,11 @@ class AmazonFreshBrowser:
         browser (Browser): The Playwright browser instance.
         context (BrowserContext): The browser context.
         page (Page): The current browser page.
+        pages (List[Page]): Pre-opened search tabs, starting with page.
         playwright (Playwright): The Playwright instance.
         session_file (str): Path to the session storage file.
+        lock (asyncio.Lock): Held by whoever is driving the browser; it is shared
+            by every session in the process.
     """
 
     def __init__(self):
@@ -32,8 +83,15 @@ class AmazonFreshBrowser:
         self.browser = None
         self.context = None
         self.page = None
+        self.pages = []
         self.playwright = None
+        # Locators on self.page, built once in start(); they re-query on each use
+        self._search_box = None
+        self._results_loc = None
         self.session_file = SESSION_FILE
+        # Set when any tab navigates, so close() can skip an unchanged session
+        self._session_dirty = False
+        self.lock = asyncio.Lock()
 
     async def start(self):
         """
@@ -45,29 +103,24 @@ class AmazonFreshBrowser:
             return
         st.toast("🚀 Launching Browser...")
         self.playwright = await async_playwright().start()
-        st.toast("🚀 Launching Browser...")
-        self.playwright = await async_playwright().start()
         
         try:
-            self.browser = await self.playwright.chromium.launch(
-                headless=False, slow_mo=1000
-            )
+            self.browser = await self.playwright.chromium.launch(headless=False)
         except Exception as e:
             if "Executable doesn't exist" in str(e):
                 st.warning("⚠️ Browser not found. Installing Chromium... This may take a minute.")
-                import subprocess
-                import sys
-                
                 # Install chromium
                 try:
-                    # Try installing via the python module
-                    subprocess.run([sys.executable, "-m", "playwright", "install", "chromium"], check=True)
+                    # Try installing via the python module, off the event loop
+                    await asyncio.to_thread(
+                        subprocess.run,
+                        [sys.executable, "-m", "playwright", "install", "chromium"],
+                        check=True,
+                    )
                     st.success("✅ Browser installed! Retrying launch...")
                     
                     # Retry launch
-                    self.browser = await self.playwright.chromium.launch(
-                        headless=False, slow_mo=1000
-                    )
+                    self.browser = await self.playwright.chromium.launch(headless=False)
                 except Exception as install_error:
                     st.error(f"❌ Failed to install browser: {install_error}")
                     raise e
@@ -83,11 +136,12 @@ class AmazonFreshBrowser:
             self.context = await self.browser.new_context(
                 viewport={"width": 1280, "height": 720}
             )
+        self.context.on("page", self._watch_navigation)
 
         self.page = await self.context.new_page()
-        await self.page.goto(
-            "https://www.amazon.com/alm/storefront?almBrandId=QW1hem9uIEZyZXNo"
-        )
+        self._search_box = self.page.locator(SEARCH_BOX_SELECTOR)
+        self._results_loc = self.page.locator(RESULT_SELECTOR)
+        await self.page.goto(FRESH_URL)
 
         try:
             if (
@@ -97,56 +151,116 @@ class AmazonFreshBrowser:
                 > 0
             ):
                 st.warning("⚠️ Please Log In manually in the browser window!")
-                await asyncio.sleep(60)
-                await self.context.storage_state(path=self.session_file)
+                # Poll for the signed-in greeting instead of always waiting the full timeout
+                account = self.page.locator("#nav-link-accountList-nav-line-1")
+                for _ in range(LOGIN_TIMEOUT):
+                    if await account.filter(has_text="Hello").count() > 0:
+                        break
+                    await asyncio.sleep(1)
+                await self._save_session()
         except Exception:
             pass
+
+        # Open the extra search tabs now (after login) so batch searches start at once
+        extra_pages = await asyncio.gather(
+            *(self.context.new_page() for _ in range(SEARCH_CONCURRENCY - 1))
+        )
+        await asyncio.gather(
+            *(page.goto(FRESH_URL) for page in extra_pages), return_exceptions=True
+        )
+        self.pages = [self.page, *extra_pages]
         st.success("✅ Browser Ready")
 
+    def _watch_navigation(self, page):
+        """Mark the session dirty whenever the given tab navigates."""
+
+        def mark_dirty(_frame):
+            self._session_dirty = True
+
+        page.on("framenavigated", mark_dirty)
+
+    async def _save_session(self):
+        """Write cookies and local storage to the session file off the event loop."""
+        state = await self.context.storage_state()
+
+        def write():
+            with open(self.session_file, "w", encoding="utf-8") as f:
+                f.write(jsonx.dumps(state))
+
+        await asyncio.to_thread(write)
+        self._session_dirty = False
+
+    def _search_locators(self, page):
+        """
+        Get the search box and result card locators for a tab.
+
+        Args:
+            page (Page): The tab to search in.
+
+        Returns:
+            tuple: The (search box, result cards) locators.
+        """
+        if page is self.page and self._search_box is not None:
+            return self._search_box, self._results_loc
+        return page.locator(SEARCH_BOX_SELECTOR), page.locator(RESULT_SELECTOR)
+
+    async def _click_add_to_cart(self, page, btn):
+        """
+        Click an add-to-cart button and wait for the cart request to finish.
+
+        Args:
+            page (Page): The tab the button is on.
+            btn (Locator): The add-to-cart button.
+        """
+        try:
+            async with page.expect_response(
+                lambda r: "cart" in r.url.lower() and r.ok, timeout=ADD_TO_CART_TIMEOUT
+            ):
+                await btn.click()
+        except PlaywrightTimeoutError:
+            pass  # The click landed; the cart just answered slowly
+
     # --- BRUTE FORCE ADD ---
-    async def search_and_add(self, item_name: str) -> dict:
+    async def search_and_add(self, item_name: str, page=None) -> dict:
         """
         Search for an item and add the first result to the cart.
 
         Args:
             item_name (str): The name of the item to search for.
+            page (Page): The tab to search in. Defaults to the main page.
 
         Returns:
             dict: A dictionary containing the status ("ADDED", "NOT_FOUND", "ERROR") and price.
         """
+        page = page or self.page
+        search_box, results_loc = self._search_locators(page)
         try:
-            search_box = self.page.locator('input[id="twotabsearchtextbox"]')
             await search_box.clear()
             await search_box.fill(item_name)
             await search_box.press("Enter")
             
             try:
                 # Smart wait for results
-                await self.page.wait_for_selector(
-                    'div[data-component-type="s-search-result"]', 
+                await page.wait_for_selector(
+                    RESULT_SELECTOR,
                     state="attached", 
                     timeout=5000
                 )
             except Exception:
                 return {"status": "NOT_FOUND", "price": 0.0}
 
-            results = await self.page.locator(
-                'div[data-component-type="s-search-result"]'
-            ).all()
-            
-            if not results:
+            # nth() is lazy, so only the cards we look at are resolved
+            count = min(await results_loc.count(), 3)
+            if not count:
                 return {"status": "NOT_FOUND", "price": 0.0}
             
             # Try the first few results in case the first one is unavailable
-            for target_card in results[:3]:
-                price = 0.0
-                try:
-                    price_el = target_card.locator(".a-price .a-offscreen").first
-                    if await price_el.count() > 0:
-                        txt = await price_el.text_content()
-                        price = float(txt.replace("$", "").replace(",", "").strip())
-                except Exception:
-                    pass
+            for i in range(count):
+                target_card = results_loc.nth(i)
+                info = await target_card.evaluate(CARD_PROBE_JS)
+                if not info["hasBtn"]:
+                    continue
+                price = _parse_price(info["price"])
 
                 # Try multiple button selectors
                 btn = target_card.get_by_role("button", name="Add to cart")
@@ -156,16 +270,59 @@ class AmazonFreshBrowser:
                     btn = target_card.locator("input[name='submit.addToCart']")
 
                 if await btn.count() > 0 and await btn.first.is_visible():
-                    await btn.first.click()
-                    # Wait for cart count to update or a success message? 
-                    # For now, just a small buffer is safer than nothing, but we rely on the UI not erroring.
-                    await asyncio.sleep(1) 
+                    await self._click_add_to_cart(page, btn.first)
                     return {"status": "ADDED", "price": price}
 
             return {"status": "NOT_FOUND", "price": 0.0}
         except Exception:
             return {"status": "ERROR", "price": 0.0}
 
+    async def search_and_add_many(
+        self,
+        items: List[str],
+        concurrency: int = SEARCH_CONCURRENCY,
+        budget: Optional[float] = None,
+    ) -> List[dict]:
+        """
+        Search for and add several items in parallel over the tab pool.
+
+        Args:
+            items (List[str]): The names of the items to search for.
+            concurrency (int): The most tabs to search from at once.
+            budget (float, optional): Money left to spend. Once the items added
+                so far reach it, no further items are started; like the shopper's
+                own check, searches already in flight may still finish.
+
+        Returns:
+            List[dict]: The search_and_add result for each item, in input order.
+                Items skipped for budget have status "BUDGET".
+        """
+        if not items:
+            return []
+        # Fall back to the main tab if the pool was never built
+        pool = self.pages or [self.page]
+        pages = pool[: min(concurrency, len(items))]
+        queue = asyncio.Queue()
+        for entry in enumerate(items):
+            queue.put_nowait(entry)
+        results = [None] * len(items)
+        spent = 0.0
+
+        async def worker(page):
+            nonlocal spent
+            while not queue.empty():
+                if budget is not None and spent >= budget:
+                    return
+                idx, item = queue.get_nowait()
+                results[idx] = await self.search_and_add(item, page=page)
+                if results[idx]["status"] == "ADDED":
+                    spent += results[idx]["price"]
+
+        await asyncio.gather(*(worker(page) for page in pages))
+        # Items never started were left in the queue once the budget ran out
+        skipped = {"status": "BUDGET" if queue.qsize() else "ERROR", "price": 0.0}
+        return [r or dict(skipped) for r in results]
+
     # --- SMART SHOPPER LOGIC ---
     async def search_and_get_options(self, item_name: str) -> List[Dict]:
         """
@@ -177,60 +334,38 @@ class AmazonFreshBrowser:
         Returns:
             List[Dict]: A list of dictionaries containing item details.
         """
+        search_box, _ = self._search_locators(self.page)
         try:
-            search_box = self.page.locator('input[id="twotabsearchtextbox"]')
             await search_box.clear()
             await search_box.fill(item_name)
             await search_box.press("Enter")
             
             try:
                 await self.page.wait_for_selector(
-                    'div[data-component-type="s-search-result"]', 
+                    RESULT_SELECTOR,
                     state="attached",
                     timeout=5000
                 )
             except Exception:
                 return []
 
-            results = await self.page.locator(
-                'div[data-component-type="s-search-result"]'
-            ).all()
+            cards = await self.page.evaluate(OPTIONS_PROBE_JS, [RESULT_SELECTOR, 5])
             
             options = []
             # Check top 5 results
-            for i, res in enumerate(results[:5]):
+            for i, info in enumerate(cards):
                 try:
-                    title = await res.locator("h2").first.text_content()
-                    
-                    # Price
-                    price_text = "0.00"
-                    if await res.locator(".a-price .a-offscreen").count() > 0:
-                        price_text = await res.locator(".a-price .a-offscreen").first.text_content()
-                    
-                    # Rating (e.g. "4.5 out of 5 stars")
-                    rating = "N/A"
-                    rating_el = res.locator("i.a-icon-star-small span.a-icon-alt")
-                    if await rating_el.count() > 0:
-                        rating = await rating_el.first.text_content()
-                    
-                    # Review Count
-                    reviews = "0"
-                    review_el = res.locator("span.a-size-base.s-underline-text")
-                    if await review_el.count() > 0:
-                        reviews = await review_el.first.text_content()
-
+                    if info["title"] is None:
+                        continue
+                    price_text = info["price"]
                     options.append(
                         {
                             "index": i,
-                            "title": title.strip(),
+                            "title": info["title"].strip(),
                             "price_str": price_text.strip(),
-                            "price": (
-                                float(price_text.replace("$", "").replace(",", "").strip())
-                                if "$" in price_text
-                                else 0.0
-                            ),
-                            "rating": rating.strip(),
-                            "reviews": reviews.strip()
+                            "price": _parse_price(price_text),
+                            "rating": info["rating"].strip(),
+                            "reviews": info["reviews"].strip()
                         }
                     )
                 except Exception:
@@ -250,12 +385,10 @@ class AmazonFreshBrowser:
             bool: True if added successfully, False otherwise.
         """
         try:
-            results = await self.page.locator(
-                'div[data-component-type="s-search-result"]'
-            ).all()
-            if index >= len(results):
+            results_loc = self._search_locators(self.page)[1]
+            if index >= await results_loc.count():
                 return False
-            target = results[index]
+            target = results_loc.nth(index)
 
             btn = target.get_by_role("button", name="Add to cart")
             if await btn.count() == 0:
@@ -266,8 +399,7 @@ class AmazonFreshBrowser:
             if await btn.count() > 0:
                 await btn.first.scroll_into_view_if_needed()
                 if await btn.first.is_visible():
-                    await btn.first.click()
-                    await asyncio.sleep(1)
+                    await self._click_add_to_cart(self.page, btn.first)
                     return True
             return False
         except Exception:
@@ -282,7 +414,11 @@ class AmazonFreshBrowser:
         """
         st.toast("🛒 Going to Cart...")
         await self.page.goto("https://www.amazon.com/gp/cart/view.html")
-        await asyncio.sleep(3)
+        try:
+            # The checkout buttons render after load; settle for at most the old 3s
+            await self.page.wait_for_load_state("networkidle", timeout=3000)
+        except PlaywrightTimeoutError:
+            pass
         st.toast("➡️ Clicking 'Check out Fresh Cart'...")
         try:
             fresh_btn = self.page.get_by_role("button", name="Check out Fresh Cart")
@@ -304,10 +440,19 @@ class AmazonFreshBrowser:
         return False
 
     async def close(self):
-        """Close the browser and save the session."""
-        if self.context:
-            await self.context.storage_state(path=self.session_file)
-        if self.browser:
-            await self.browser.close()
-        if self.playwright:
-            await self.playwright.stop()
+        """
+        Close the browser and save the session.
+
+        The instance is reset afterwards, so the next start() launches a fresh browser.
+        Waits for any shopper run holding the lock to finish first.
+        """
+        async with self.lock:
+            if self.context and self._session_dirty:
+                await self._save_session()
+            if self.browser:
+                await self.browser.close()
+            if self.playwright:
+                await self.playwright.stop()
+            self.browser = self.context = self.page = self.playwright = None
+            self.pages = []
+            self._search_box = self._results_loc = None
@@ -1,8 +1,31 @@
 import PyInstaller.__main__
 import os
 import shutil
+import tempfile
 import streamlit
 
+# Streamlit files the packaged app never reads at runtime
+STREAMLIT_EXCLUDES = shutil.ignore_patterns("*.map", "*.pyc", "__pycache__", "tests")
+
+
+def stage_streamlit_data(staging_dir):
+    """Copies Streamlit's static and runtime trees without unused files.
+
+    Args:
+        staging_dir: Directory to copy the filtered trees into.
+
+    Returns:
+        A list of (source_path, dest_path) pairs for --add-data.
+    """
+    streamlit_path = os.path.dirname(streamlit.__file__)
+    staged = []
+    for sub in ("static", "runtime"):
+        dst = os.path.join(staging_dir, sub)
+        shutil.copytree(os.path.join(streamlit_path, sub), dst, ignore=STREAMLIT_EXCLUDES)
+        staged.append((dst, f"streamlit/{sub}"))
+    return staged
+
+
 def build():
     print("🚀 Starting build process...")
     
@@ -25,13 +48,13 @@ def build():
         ("config.py", "."),
         ("utils.py", "."),
         ("pdf_generator.py", "."),
+        ("jsonx.py", "."),
         (".env", ".") if os.path.exists(".env") else None,
     ]
     
-    # Add Streamlit static files
-    streamlit_path = os.path.dirname(streamlit.__file__)
-    datas.append((os.path.join(streamlit_path, "static"), "streamlit/static"))
-    datas.append((os.path.join(streamlit_path, "runtime"), "streamlit/runtime"))
+    # Add Streamlit static files, minus source maps, bytecode and tests
+    staging_dir = tempfile.mkdtemp(prefix="streamlit_data_")
+    datas.extend(stage_streamlit_data(staging_dir))
 
     datas = [d for d in datas if d is not None]
 
@@ -45,30 +68,33 @@ def build():
     args = [
         "packaging/run_streamlit.py",  # Entry point
         "--name=AmazonFreshAgent",
-        "--onefile",
+        "--onedir",  # No per-launch unpacking to a temp dir, unlike --onefile
         "--clean",
         "--additional-hooks-dir=packaging",
         "--hidden-import=streamlit",
-        "--hidden-import=langchain",
-        "--hidden-import=langchain_google_genai",
-        "--hidden-import=langchain_core",
-        "--hidden-import=langgraph",
-        "--hidden-import=langgraph.graph",
-        "--hidden-import=langgraph.checkpoint",
-        "--hidden-import=langgraph.checkpoint.memory",
+        # The app modules ship as data, so PyInstaller never sees their imports;
+        # pull in whole packages rather than listing submodules by hand
+        "--collect-submodules=langchain_google_genai",
+        "--collect-submodules=langchain_core",
+        "--collect-submodules=langgraph",
         "--hidden-import=dotenv",
         "--hidden-import=playwright",
         "--hidden-import=playwright.async_api",
         "--hidden-import=fpdf",
         "--hidden-import=pandas",
         "--hidden-import=sqlite3",
+        "--hidden-import=orjson",
+        "--hidden-import=uvloop",
     ] + add_data_args
 
     print(f"📦 Running PyInstaller with args: {args}")
     
-    PyInstaller.__main__.run(args)
+    try:
+        PyInstaller.__main__.run(args)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
     
-    print("✅ Build complete! Check the 'dist' folder.")
+    print("✅ Build complete! Check the 'dist/AmazonFreshAgent' folder.")
 
 if __name__ == "__main__":
     build()
@@ -6,16 +6,22 @@ import os
 
 # --- DATABASE ---
 DB_NAME = "agent_data.db"
+CHECKPOINT_DB = "agent_checkpoints.db"
+CHECKPOINT_MAX_AGE_HOURS = 24
+DB_MAINTENANCE_INTERVAL = 3600  # Seconds between WAL checkpoint/vacuum runs
 
 # --- BROWSER ---
 SESSION_FILE = "amazon_session.json"
 HEADLESS_MODE = False  # Set to True if you want headless in the future
+LOGIN_TIMEOUT = 60  # Seconds to wait for a manual login
+ADD_TO_CART_TIMEOUT = 5000  # Milliseconds to wait for the cart to confirm an add
+SEARCH_CONCURRENCY = 4  # Parallel search tabs; keep low to avoid Amazon throttling
 
 # --- AI MODELS ---
 PLANNER_MODEL = "gemini-2.5-pro"
 SHOPPER_MODEL = "gemini-2.5-flash"
 EXTRACTOR_MODEL = "gemini-2.5-pro"
 
-# --- UI & PROMPTS MOVED TO ui.py AND prompts.py ---
+# --- UI --- (DEFAULT_PROMPT lives in prompts.py, STREAMLIT_STYLE in ui.py)
 PAGE_TITLE = "Amazon Fresh Fetch"
 PAGE_ICON = "🥕"
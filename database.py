@@ -5,10 +5,15 @@ This module handles all SQLite database interactions, including storing user set
 and saving/retrieving meal plans.
 """
 
+import os
+import queue
 import sqlite3
-import json
+import threading
+import urllib.parse
+from contextlib import contextmanager
 from datetime import datetime
 
+import jsonx
 from config import DB_NAME
 
 
@@ -16,10 +21,34 @@ class DBManager:
     """
     Manages the SQLite database for the agent.
 
+    Writes go through one shared connection; reads borrow read-only connections
+    from a small pool, which WAL lets run alongside the writer.
+
     Attributes:
-        conn (sqlite3.Connection): The database connection object.
+        conn (sqlite3.Connection): The read-write connection.
+        write_lock (threading.RLock): Serializes writes on the shared connection.
     """
 
+    # Hot-path statements; the connection caches their compiled form by SQL text
+    _SAVE_SETTING_SQL = (
+        "INSERT INTO settings (key, value) VALUES (?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value=excluded.value"
+    )
+    _GET_SETTING_SQL = "SELECT value FROM settings WHERE key=?"
+    _SAVE_PLAN_SQL = (
+        "INSERT INTO meal_plans (date, prompt, plan_json, shopping_list) VALUES (?, ?, ?, ?)"
+    )
+    _SAVE_PLAN_ITEM_SQL = "INSERT INTO plan_items (plan_id, item) VALUES (?, ?)"
+    # id is the rowid, so this walks the table tail backwards; no extra index needed
+    _GET_RECENT_SQL = (
+        "SELECT id, date, prompt, plan_json, shopping_list FROM meal_plans "
+        "WHERE json_valid(shopping_list) ORDER BY id DESC LIMIT ?"
+    )
+    _DELETE_PLAN_SQL = "DELETE FROM meal_plans WHERE id=?"
+    _PAST_ITEMS_SQL = (
+        "SELECT item FROM plan_items GROUP BY item ORDER BY MAX(plan_id) DESC LIMIT 500"
+    )
+
     def __init__(self, db_name=DB_NAME):
         """
         Initialize the DBManager.
@@ -27,8 +56,69 @@ class DBManager:
         Args:
             db_name (str): The name of the database file. Defaults to DB_NAME.
         """
-        self.conn = sqlite3.connect(db_name, check_same_thread=False)
+        self.conn = sqlite3.connect(
+            db_name, check_same_thread=False, cached_statements=256
+        )
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA wal_autocheckpoint=1000")
+        # Safe under WAL: only the last commits can be lost on power failure
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA cache_size=-20000")  # ~20 MB page cache
+        self.conn.execute("PRAGMA mmap_size=268435456")  # Read up to 256 MB via mmap
+        # Only takes effect on a new file; existing files are converted in migrate()
+        self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        # Streamlit reruns and the agent loop share this connection across threads
+        self.write_lock = threading.RLock()
+        self._tx_depth = 0
         self.create_tables()
+        self.migrate()
+        # An in-memory database only exists on its own connection
+        self._read_uri = (
+            None
+            if db_name == ":memory:"
+            else f"file:{urllib.parse.quote(os.path.abspath(db_name))}?mode=ro"
+        )
+        # Read-only connections, borrowed per query and shared by every thread;
+        # Streamlit runs each rerun on a new thread, so per-thread ones would not last
+        self._read_pool = queue.LifoQueue()
+        self._readers = []
+        # get_all_past_items result; writers bump the generation to invalidate it
+        self._past_items_cache = None
+        self._plans_generation = 0
+
+    @contextmanager
+    def _reader(self):
+        """
+        Borrow a read-only connection from the pool, opening one if none is free.
+
+        Yields:
+            sqlite3.Connection: The connection to run SELECTs on.
+        """
+        if self._read_uri is None:
+            yield self.conn
+            return
+        try:
+            conn = self._read_pool.get_nowait()
+        except queue.Empty:
+            conn = sqlite3.connect(
+                self._read_uri, uri=True, check_same_thread=False, cached_statements=256
+            )
+            conn.execute("PRAGMA mmap_size=268435456")
+            self._readers.append(conn)
+        try:
+            yield conn
+        finally:
+            self._read_pool.put(conn)
+
+    def close(self):
+        """Close the read-write connection and every pooled reader."""
+        for reader in self._readers:
+            reader.close()
+        self._readers.clear()
+        self._read_pool = queue.LifoQueue()
+        self.conn.close()
 
     def create_tables(self):
         """Create the necessary tables if they do not exist."""
@@ -45,8 +135,86 @@ class DBManager:
                       plan_json TEXT, 
                       shopping_list TEXT)"""
         )
+        c.execute(
+            """CREATE TABLE IF NOT EXISTS plan_items 
+                     (plan_id INTEGER REFERENCES meal_plans(id) ON DELETE CASCADE, 
+                      item TEXT COLLATE NOCASE)"""
+        )
+        c.execute(
+            "CREATE INDEX IF NOT EXISTS idx_plan_items_item ON plan_items(item)"
+        )
+        c.execute(
+            "CREATE INDEX IF NOT EXISTS idx_plan_items_plan ON plan_items(plan_id)"
+        )
         self.conn.commit()
 
+    def migrate(self):
+        """
+        Run one-shot schema migrations, tracked via PRAGMA user_version.
+
+        Version 1 backfills plan_items from the shopping_list JSON of plans
+        saved before the table existed. Version 2 switches files created
+        without auto_vacuum to incremental auto-vacuum, which needs a VACUUM.
+        """
+        c = self.conn.cursor()
+        version = c.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            c.execute("SELECT id, shopping_list FROM meal_plans")
+            rows = []
+            for plan_id, list_str in c.fetchall():
+                try:
+                    items = jsonx.loads(list_str)
+                    rows.extend(
+                        (plan_id, i.strip()) for i in items if isinstance(i, str) and i.strip()
+                    )
+                except (jsonx.JSONDecodeError, TypeError):
+                    continue
+            c.execute("DELETE FROM plan_items")
+            c.executemany(self._SAVE_PLAN_ITEM_SQL, rows)
+            c.execute("PRAGMA user_version = 1")
+        self.conn.commit()
+        if version < 2:
+            if c.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                c.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                c.execute("VACUUM")
+            c.execute("PRAGMA user_version = 2")
+            self.conn.commit()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group several writes into one commit.
+
+        The save_* and delete_* methods skip their own commit while inside this
+        block; everything is committed on exit, or rolled back on an exception.
+        """
+        with self.write_lock:
+            self._tx_depth += 1
+            try:
+                yield self
+            except BaseException:
+                if self._tx_depth == 1:
+                    self.conn.rollback()
+                raise
+            else:
+                if self._tx_depth == 1:
+                    self.conn.commit()
+            finally:
+                self._tx_depth -= 1
+                if not self._tx_depth:
+                    self._invalidate_past_items()
+
+    def _commit(self):
+        """Commit pending writes unless a transaction() will commit them."""
+        if not self._tx_depth:
+            self.conn.commit()
+
+    def maintenance(self):
+        """Truncate the WAL file and return up to 100 free pages to the OS."""
+        with self.write_lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+            self.conn.execute("PRAGMA incremental_vacuum(100)").fetchall()
+
     def save_setting(self, key, value):
         """
         Save a user setting to the database.
@@ -55,9 +223,20 @@ class DBManager:
             key (str): The setting key.
             value (str): The setting value.
         """
-        c = self.conn.cursor()
-        c.execute("REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
-        self.conn.commit()
+        with self.write_lock:
+            self.conn.execute(self._SAVE_SETTING_SQL, (key, value))
+            self._commit()
+
+    def save_settings(self, settings):
+        """
+        Save several user settings in a single transaction.
+
+        Args:
+            settings (dict): Mapping of setting keys to values.
+        """
+        with self.write_lock:
+            self.conn.executemany(self._SAVE_SETTING_SQL, settings.items())
+            self._commit()
 
     def get_setting(self, key, default=""):
         """
@@ -70,11 +249,33 @@ class DBManager:
         Returns:
             str: The setting value or the default.
         """
-        c = self.conn.cursor()
-        c.execute("SELECT value FROM settings WHERE key=?", (key,))
-        result = c.fetchone()
+        with self._reader() as conn:
+            result = conn.execute(self._GET_SETTING_SQL, (key,)).fetchone()
         return result[0] if result else default
 
+    def get_settings(self, defaults):
+        """
+        Retrieve several user settings in a single query.
+
+        Args:
+            defaults (dict): Mapping of setting keys to their default values.
+
+        Returns:
+            dict: The stored value for each key, or its default.
+        """
+        placeholders = ",".join("?" * len(defaults))
+        with self._reader() as conn:
+            rows = conn.execute(
+                f"SELECT key, value FROM settings WHERE key IN ({placeholders})",
+                tuple(defaults),
+            ).fetchall()
+        return {**defaults, **dict(rows)}
+
+    def _invalidate_past_items(self):
+        """Drop the cached past items. Call with write_lock held, after commit."""
+        self._plans_generation += 1
+        self._past_items_cache = None
+
     def save_plan(self, prompt, plan_json, shopping_list):
         """
         Save a generated meal plan to the database.
@@ -84,14 +285,28 @@ class DBManager:
             plan_json (str): The JSON string of the meal plan.
             shopping_list (list): The list of shopping items.
         """
-        c = self.conn.cursor()
         date_str = datetime.now().strftime("%Y-%m-%d %H:%M")
-        list_str = json.dumps(shopping_list)
-        c.execute(
-            "INSERT INTO meal_plans (date, prompt, plan_json, shopping_list) VALUES (?, ?, ?, ?)",
-            (date_str, prompt, plan_json, list_str),
-        )
-        self.conn.commit()
+        list_str = jsonx.dumps(shopping_list)
+        # A failure after the plan row is written rolls the whole plan back
+        with self.transaction():
+            plan_id = self.conn.execute(
+                self._SAVE_PLAN_SQL, (date_str, prompt, plan_json, list_str)
+            ).lastrowid
+            self.conn.executemany(
+                self._SAVE_PLAN_ITEM_SQL,
+                [(plan_id, i.strip()) for i in shopping_list if isinstance(i, str) and i.strip()],
+            )
+
+    def save_plans_bulk(self, rows):
+        """
+        Save several meal plans in a single transaction.
+
+        Args:
+            rows (iterable): (prompt, plan_json, shopping_list) tuples, as for save_plan.
+        """
+        with self.transaction():
+            for prompt, plan_json, shopping_list in rows:
+                self.save_plan(prompt, plan_json, shopping_list)
 
     def get_recent_plans(self, limit=5):
         """
@@ -103,27 +318,33 @@ class DBManager:
         Returns:
             list: A list of dictionaries containing plan details.
         """
-        c = self.conn.cursor()
-        c.execute(
-            "SELECT id, date, prompt, plan_json, shopping_list FROM meal_plans ORDER BY id DESC LIMIT ?",
-            (limit,),
-        )
+        with self._reader() as conn:
+            rows = conn.execute(self._GET_RECENT_SQL, (limit,)).fetchall()
         return [
             {
                 "id": r[0],
                 "date": r[1],
                 "prompt": r[2],
                 "json": r[3],
-                "list": json.loads(r[4]),
+                "list": jsonx.loads(r[4]),
             }
-            for r in c.fetchall()
+            for r in rows
         ]
 
     def delete_all_plans(self):
-        """Delete all saved meal plans from the database."""
-        c = self.conn.cursor()
-        c.execute("DELETE FROM meal_plans")
-        self.conn.commit()
+        """
+        Delete all saved meal plans from the database.
+
+        Large histories are followed by a VACUUM so the freed pages are reclaimed.
+        """
+        with self.write_lock:
+            count = self.conn.execute("SELECT COUNT(*) FROM meal_plans").fetchone()[0]
+            self.conn.execute("DELETE FROM meal_plans")
+            self._commit()
+            self._invalidate_past_items()
+            # VACUUM cannot run inside an open transaction()
+            if count > 1000 and not self._tx_depth:
+                self.conn.execute("VACUUM")
 
     def delete_plan(self, plan_id):
         """
@@ -132,9 +353,10 @@ class DBManager:
         Args:
             plan_id (int): The ID of the plan to delete.
         """
-        c = self.conn.cursor()
-        c.execute("DELETE FROM meal_plans WHERE id=?", (plan_id,))
-        self.conn.commit()
+        with self.write_lock:
+            self.conn.execute(self._DELETE_PLAN_SQL, (plan_id,))
+            self._commit()
+            self._invalidate_past_items()
 
     # --- PREFERENCE LEARNING ---
     def get_all_past_items(self):
@@ -142,20 +364,20 @@ class DBManager:
         Retrieve all unique items from past shopping lists.
 
         Returns:
-            str: A comma-separated string of all unique items.
+            str: A comma-separated string of all unique items (case-insensitive),
+                most recent first and capped at 500.
         """
-        c = self.conn.cursor()
-        c.execute("SELECT shopping_list FROM meal_plans")
-        rows = c.fetchall()
-        all_items = set()
-        for r in rows:
-            try:
-                items = json.loads(r[0])
-                for i in items:
-                    all_items.add(i.strip())
-            except (json.JSONDecodeError, TypeError):
-                pass
-        return ", ".join(list(all_items))
-
+        cached = self._past_items_cache
+        if cached is not None:
+            return cached
+        generation = self._plans_generation
+        # Most recently bought first, capped so the extractor prompt stays small
+        with self._reader() as conn:
+            rows = conn.execute(self._PAST_ITEMS_SQL).fetchall()
+        result = ", ".join(r[0] for r in rows)
+        # Only keep it if no plan was written while the query ran
+        if generation == self._plans_generation:
+            self._past_items_cache = result
+        return result
 
 db = DBManager()
@@ -0,0 +1,33 @@
+"""
+Fast JSON helpers for the Amazon Fresh Fetch Agent.
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise. Both ``loads`` and ``dumps`` work with ``str`` so callers can swap
+them in for ``json.loads``/``json.dumps`` directly.
+"""
+
+try:
+    import orjson
+
+    JSONDecodeError = orjson.JSONDecodeError
+
+    def loads(data):
+        """Parse JSON from str or bytes."""
+        return orjson.loads(data)
+
+    def dumps(obj):
+        """Serialize obj to a compact JSON string."""
+        return orjson.dumps(obj).decode()
+
+except ImportError:  # pragma: no cover - exercised only without orjson
+    import json
+
+    JSONDecodeError = json.JSONDecodeError
+
+    def loads(data):
+        """Parse JSON from str or bytes."""
+        return json.loads(data)
+
+    def dumps(obj):
+        """Serialize obj to a compact JSON string."""
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
@@ -1,6 +1,5 @@
 import os
 import sys
-import streamlit.web.cli as stcli
 
 def resolve_path(path):
     if getattr(sys, "frozen", False):
@@ -9,9 +8,10 @@ def resolve_path(path):
         basedir = os.path.dirname(__file__)
     return os.path.join(basedir, path)
 
-    return os.path.join(basedir, path)
-
 if __name__ == "__main__":
+    # Imported here so the module itself stays cheap to import
+    import streamlit.web.cli as stcli
+
     # Force Playwright to look in the system cache, not the temp bundle directory
     os.environ["PLAYWRIGHT_BROWSERS_PATH"] = "0"
 
@@ -4,38 +4,63 @@ PDF generation module for Amazon Fresh Agent.
 This module handles the creation of PDF meal plans and shopping lists using FPDF.
 """
 
-import json
+from functools import lru_cache
 from typing import List
 
-from fpdf import FPDF
+import jsonx
 
+# fpdf2 maps "Arial" onto this core font, warning on every set_font call;
+# naming it directly also lets set_font skip switches to the current font
+FONT = "helvetica"
 
-class MealPlanPDF(FPDF):
+
+@lru_cache(maxsize=1)
+def _pdf_class():
     """
-    Custom PDF class for meal plans.
+    Define MealPlanPDF on first use, so importing this module skips fpdf.
 
-    Inherits from FPDF.
+    Returns:
+        type: The MealPlanPDF class.
     """
+    from fpdf import FPDF
 
-    def header(self):
-        """Set up the PDF header."""
-        self.set_font("Arial", "B", 16)
-        self.cell(0, 10, "Amazon Fresh Fetch - Weekly Plan", 0, 1, "C")
-        self.ln(5)
+    class MealPlanPDF(FPDF):
+        """
+        Custom PDF class for meal plans.
 
-    def clean_text(self, text):
+        Inherits from FPDF.
         """
-        Sanitize text for PDF output.
 
-        Args:
-            text (str): The text to clean.
+        def header(self):
+            """Set up the PDF header."""
+            self.set_font(FONT, "B", 16)
+            self.cell(0, 10, "Amazon Fresh Fetch - Weekly Plan", 0, 1, "C")
+            self.ln(5)
 
-        Returns:
-            str: The cleaned text encoded in latin-1.
-        """
-        if not text:
-            return ""
-        return text.encode("latin-1", "replace").decode("latin-1")
+        def clean_text(self, text):
+            """
+            Sanitize text for PDF output.
+
+            Args:
+                text (str | None): The text to clean. Other values (e.g. an
+                    ingredient list the LLM returned as an array) are converted
+                    with str().
+
+            Returns:
+                str: The cleaned text encoded in latin-1.
+            """
+            if text is None:
+                return ""
+            return str(text).encode("latin-1", "replace").decode("latin-1")
+
+    return MealPlanPDF
+
+
+def __getattr__(name):
+    """Resolve MealPlanPDF lazily for ``from pdf_generator import MealPlanPDF``."""
+    if name == "MealPlanPDF":
+        return _pdf_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def generate_pdf(meal_json_str: str, shopping_list: List[str]) -> bytes:
@@ -49,37 +74,38 @@ def generate_pdf(meal_json_str: str, shopping_list: List[str]) -> bytes:
     Returns:
         bytes: The generated PDF file as bytes.
     """
-    pdf = MealPlanPDF()
+    pdf = _pdf_class()()
     pdf.add_page()
 
-    pdf.set_font("Arial", "B", 14)
+    pdf.set_font(FONT, "B", 14)
     pdf.cell(0, 10, "Master Shopping List", 0, 1, "L")
-    pdf.set_font("Arial", "", 10)
+    pdf.set_font(FONT, "", 10)
     col_width = 90
-    for i in range(0, len(shopping_list), 2):
-        item1 = shopping_list[i]
-        item2 = shopping_list[i + 1] if i + 1 < len(shopping_list) else ""
-        pdf.cell(col_width, 7, f"[ ] {pdf.clean_text(item1)}", 0, 0)
-        if item2:
-            pdf.cell(col_width, 7, f"[ ] {pdf.clean_text(item2)}", 0, 1)
+    # Sanitize every label up front; the layout loop then only places cells
+    labels = [f"[ ] {pdf.clean_text(item)}" for item in shopping_list]
+    cell = pdf.cell
+    for i in range(0, len(labels), 2):
+        cell(col_width, 7, labels[i], 0, 0)
+        if i + 1 < len(labels) and shopping_list[i + 1]:
+            cell(col_width, 7, labels[i + 1], 0, 1)
         else:
             pdf.ln(7)
     pdf.ln(10)
 
     try:
-        data = json.loads(meal_json_str)
+        data = jsonx.loads(meal_json_str)
         schedule = data.get("schedule", [])
+        pdf.set_fill_color(240, 240, 240)
         for day in schedule:
             pdf.add_page()
-            pdf.set_font("Arial", "B", 16)
+            pdf.set_font(FONT, "B", 16)
             pdf.set_text_color(255, 75, 75)
             pdf.cell(0, 10, pdf.clean_text(day["day"]), 0, 1, "L")
             pdf.set_text_color(0, 0, 0)
             for meal_type in ["breakfast", "lunch", "dinner"]:
                 meal_data = day.get(meal_type)
                 if isinstance(meal_data, dict):
-                    pdf.set_font("Arial", "B", 12)
-                    pdf.set_fill_color(240, 240, 240)
+                    pdf.set_font(FONT, "B", 12)
                     pdf.cell(
                         0,
                         8,
@@ -89,21 +115,18 @@ def generate_pdf(meal_json_str: str, shopping_list: List[str]) -> bytes:
                         "L",
                         fill=True,
                     )
-                    pdf.set_font("Arial", "", 10)
+                    pdf.set_font(FONT, "", 10)
                     
                     # Force reset X to left margin to ensure full width availability
                     pdf.set_x(pdf.l_margin)
-                    pdf.multi_cell(
-                        0, 5, f"Ing: {pdf.clean_text(meal_data.get('ingredients', ''))}"
-                    )
-                    
-                    pdf.set_x(pdf.l_margin)
+                    # One block, so fpdf lays out and wraps both lines in a single pass
                     pdf.multi_cell(
                         0,
                         5,
+                        f"Ing: {pdf.clean_text(meal_data.get('ingredients', ''))}\n"
                         f"Steps: {pdf.clean_text(meal_data.get('instructions', ''))}",
                     )
                     pdf.ln(5)
-    except (json.JSONDecodeError, TypeError):
+    except (jsonx.JSONDecodeError, TypeError):
         pass
-    return bytes(pdf.output(dest="S"))
+    return bytes(pdf.output())
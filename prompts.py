@@ -2,9 +2,11 @@
 Centralized prompts for the Amazon Fresh Fetch Agent.
 """
 
+from typing import Final
+
 # --- MEAL PLANNER PROMPTS ---
 
-DEFAULT_PROMPT = (
+DEFAULT_PROMPT: Final[str] = (
     "You are a world-class nutritionist and meal planning expert. "
     "Create a tailored Monday-Friday meal plan (Breakfast, Lunch, Dinner) for 2 adults.\n\n"
     "**CORE CONSTRAINTS:**\n"
@@ -30,7 +32,7 @@ DEFAULT_PROMPT = (
     "Return a VALID JSON object with exactly one key: 'schedule'."
 )
 
-PLANNER_SYSTEM_PROMPT = """You are a professional chef. Create a JSON object with ONE key: "schedule".
+PLANNER_SYSTEM_PROMPT: Final[str] = """You are a professional chef. Create a JSON object with ONE key: "schedule".
 The "schedule" is an array of objects. Each object represents a DAY and must have:
 - "day": "Monday", "Tuesday", etc.
 - "breakfast": {{ "title": "Name", "ingredients": "Specific list with quantities (e.g. '2 Eggs', '1 cup Oats')", "instructions": "Steps" }}
@@ -43,7 +45,7 @@ CRITICAL: You must list specific quantities (lbs, oz, cups, count) for every ing
 
 # --- EXTRACTOR PROMPTS ---
 
-EXTRACTOR_SYSTEM_PROMPT = """You are a rigorous shopping list compiler.
+EXTRACTOR_SYSTEM_PROMPT: Final[str] = """You are a rigorous shopping list compiler.
 1. Read the provided JSON meal plan.
 2. Extract the 'ingredients' string from EVERY meal.
 3. Consolidate items by summing up quantities where possible (e.g., "2 eggs" + "2 eggs" = "4 Eggs").
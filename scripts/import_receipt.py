@@ -1,6 +1,15 @@
 import sqlite3
 import re
 import os
+import sys
+
+# Receipt parsing patterns, compiled once
+# Example: "$0.40 promotion applied"
+PROMO_RE = re.compile(r'\$\d+\.\d+\s+promotion applied')
+# Quantity + price block, e.g. "1$1.73" or "2$4.98"
+PRICE_SPLIT_RE = re.compile(r'(\d+\$\d+\.\d+)')
+# Quantity stuck to the end of a name, e.g. "Peanut Butter1"
+TRAIL_DIGITS_RE = re.compile(r'\d+$')
 
 # --- PASTE YOUR NEW DATA HERE ---
 RAW_DATA = """
@@ -14,6 +23,9 @@ def import_data():
     db_path = "agent_data.db"
     # We don't check for existence because we want to create it if it's missing
     conn = sqlite3.connect(db_path)
+    # Same journal settings as the app's DBManager
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
     c = conn.cursor()
 
     # Ensure the table exists
@@ -26,12 +38,12 @@ def import_data():
     
     # Remove promotion text which messes up splitting
     # Example: "$0.40 promotion applied"
-    clean_text = re.sub(r'\$\d+\.\d+\s+promotion applied', '', clean_text)
+    clean_text = PROMO_RE.sub('', clean_text)
 
     # Split by the price pattern: Number + $ + Digits + . + Digits
     # This regex handles cases like "1$1.73" or "2$4.98"
     # (\d+\$\d+\.\d+) captures the price block
-    tokens = re.split(r'(\d+\$\d+\.\d+)', clean_text)
+    tokens = PRICE_SPLIT_RE.split(clean_text)
     
     items_found = []
     
@@ -44,27 +56,28 @@ def import_data():
         # Clean up the item name
         # The quantity number (e.g. '1' or '2') is usually stuck to the end of the name
         # Example: "Peanut Butter1" -> "Peanut Butter"
-        item_name = re.sub(r'\d+$', '', token).strip() 
+        item_name = TRAIL_DIGITS_RE.sub('', token).strip() 
         
         if len(item_name) > 3: 
             items_found.append(item_name)
 
     # 3. Insert into DB
     print(f"🔍 Found {len(items_found)} items.")
-    count_new = 0
-    
-    for item in items_found:
-        print(f"   -> {item}")
-        try:
-            # Upsert: Add 1 to count if exists, else insert
-            c.execute("""
-                INSERT INTO purchase_history (item_name, count) 
-                VALUES (?, 1) 
-                ON CONFLICT(item_name) DO UPDATE SET count = count + 1
-            """, (item,))
-            count_new += 1
-        except Exception as e:
-            print(f"Error saving {item}: {e}")
+    # One write for the whole listing instead of a print (and flush) per item
+    sys.stdout.write("".join(f"   -> {item}\n" for item in items_found))
+
+    try:
+        # Upsert all items in one transaction: add 1 to count if exists, else insert
+        c.executemany("""
+            INSERT INTO purchase_history (item_name, count) 
+            VALUES (?, 1) 
+            ON CONFLICT(item_name) DO UPDATE SET count = count + 1
+        """, [(item,) for item in items_found])
+        count_new = len(items_found)
+    except sqlite3.Error as e:
+        conn.rollback()
+        print(f"Error saving items: {e}")
+        count_new = 0
 
     conn.commit()
     conn.close()
@@ -122,6 +122,30 @@ class TestExtractorNode(unittest.IsolatedAsyncioTestCase):
         self.assertIn("Bread", result["shopping_list"])
         self.assertIn("Butter", result["shopping_list"])
 
+    @patch("agent.st")
+    @patch("agent.db")
+    @patch("agent.ChatGoogleGenerativeAI")
+    async def test_extractor_node_normalizes_whitespace(self, mock_llm_class, mock_db, mock_st):
+        """Test extractor node collapses whitespace and drops empty items."""
+        mock_st.status.return_value.__enter__.return_value = MagicMock()
+        mock_db.get_all_past_items.return_value = ""
+
+        mock_response = MagicMock()
+        mock_response.content = "  Large\n  Eggs , ,Whole   Milk,\t"
+
+        mock_chain = AsyncMock()
+        mock_chain.ainvoke.return_value = mock_response
+        mock_llm_class.return_value = AsyncMock()
+
+        state = {"meal_plan_json": json.dumps({"schedule": []})}
+
+        with patch("agent.ChatPromptTemplate") as mock_template:
+            mock_template.from_messages.return_value.__or__ = MagicMock(return_value=mock_chain)
+
+            result = await extractor_node(state)
+
+        self.assertEqual(result["shopping_list"], ["Large Eggs", "Whole Milk"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,74 @@
+"""
+Unit tests for amazon_fresh_fetch.py
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from streamlit.testing.v1 import AppTest
+
+APP_FILE = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "amazon_fresh_fetch.py")
+)
+
+
+class TestCredentialGate(unittest.TestCase):
+    """Test cases for the API key check at the top of the app script."""
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch("utils.load_dotenv")
+    def test_stops_before_app_when_key_missing(self, mock_load_dotenv):
+        """Test that a missing key stops the run before the app is built."""
+        at = AppTest.from_file(APP_FILE).run()
+        self.assertFalse(at.exception)
+        self.assertEqual(len(at.warning), 1)
+        self.assertIn("API Key Required", at.warning[0].value)
+        # Nothing below the credential check was rendered
+        self.assertEqual(len(at.title), 0)
+        self.assertEqual(len(at.button), 0)
+
+    @patch.dict(os.environ, {}, clear=True)
+    @patch("utils.load_dotenv")
+    def test_entered_key_used_without_rerun(self, mock_load_dotenv):
+        """Test that a key typed into the sidebar unlocks the app in the same run."""
+        # The unlocked app opens its checkpoint database in the working directory
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(tmp_dir.name)
+
+        at = AppTest.from_file(APP_FILE).run()
+        at.text_input[0].input("test-key").run()
+        self.assertFalse(at.exception)
+        self.assertEqual(at.session_state.api_key, "test-key")
+        self.assertEqual(len(at.title), 1)
+        # The key stays in this session; it is not published to the process
+        self.assertNotIn("GOOGLE_API_KEY", os.environ)
+
+
+class TestSessionThreads(unittest.TestCase):
+    """Test cases for keeping each session on its own graph thread."""
+
+    def setUp(self):
+        """Run the app from a temp dir, where it opens its checkpoint database."""
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(tmp_dir.name)
+
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    def test_each_session_gets_its_own_thread_id(self):
+        """Test that two sessions never share a graph thread, and reruns keep theirs."""
+        first = AppTest.from_file(APP_FILE).run()
+        second = AppTest.from_file(APP_FILE).run()
+        self.assertFalse(first.exception)
+        thread_id = first.session_state.thread_id
+        self.assertNotEqual(thread_id, second.session_state.thread_id)
+        first.run()
+        self.assertEqual(first.session_state.thread_id, thread_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
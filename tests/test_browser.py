@@ -5,10 +5,11 @@ Note: These tests focus on testable logic like price parsing.
 Full browser automation would require integration tests with Playwright.
 """
 
+import asyncio
 import unittest
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from browser import AmazonFreshBrowser
+from browser import AmazonFreshBrowser, _parse_price
 
 
 class TestAmazonFreshBrowser(unittest.IsolatedAsyncioTestCase):
@@ -31,7 +32,9 @@ class TestAmazonFreshBrowser(unittest.IsolatedAsyncioTestCase):
         mock_playwright = AsyncMock()
         mock_browser = AsyncMock()
         mock_context = AsyncMock()
+        mock_context.on = MagicMock()  # BrowserContext.on is synchronous
         mock_page = AsyncMock()
+        mock_page.locator = MagicMock()  # Page.locator is synchronous
 
         mock_playwright.chromium.launch.return_value = mock_browser
         mock_browser.new_context.return_value = mock_context
@@ -54,22 +57,163 @@ class TestAmazonFreshBrowser(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(browser.browser, mock_browser)
         self.assertEqual(browser.context, mock_context)
         self.assertEqual(browser.page, mock_page)
+        self.assertEqual(browser.pages[0], mock_page)
+        mock_playwright.chromium.launch.assert_awaited_once_with(headless=False)
 
-    async def test_price_parsing_logic(self):
-        """Test price string parsing logic (extracted from search_and_add)."""
-        # This tests the logic used in the browser methods
+    async def test_search_and_add_skips_cards_without_button(self):
+        """Test that search_and_add probes each card once and skips unbuyable ones."""
+        no_btn_card = MagicMock()
+        no_btn_card.evaluate = AsyncMock(return_value={"price": "", "hasBtn": False})
+
+        btn = MagicMock()
+        btn.count = AsyncMock(return_value=1)
+        btn.first.is_visible = AsyncMock(return_value=True)
+        btn.first.click = AsyncMock()
+        buy_card = MagicMock()
+        buy_card.evaluate = AsyncMock(return_value={"price": "$1,234.56", "hasBtn": True})
+        buy_card.get_by_role.return_value = btn
+
+        page = MagicMock()
+        page.wait_for_selector = AsyncMock()
+        locator = page.locator.return_value
+        locator.clear = AsyncMock()
+        locator.fill = AsyncMock()
+        locator.press = AsyncMock()
+        locator.count = AsyncMock(return_value=20)
+        locator.nth.side_effect = [no_btn_card, buy_card]
+
+        browser = AmazonFreshBrowser()
+        browser.page = page
+        result = await browser.search_and_add("Eggs")
+
+        self.assertEqual(result, {"status": "ADDED", "price": 1234.56})
+        no_btn_card.get_by_role.assert_not_called()
+        btn.first.click.assert_awaited_once()
+        # Waits on the cart response rather than a fixed sleep
+        page.expect_response.assert_called_once()
+
+    async def test_search_and_get_options_reads_cards_in_one_call(self):
+        """Test that search_and_get_options reads all top cards with a single evaluate."""
+        page = MagicMock()
+        page.wait_for_selector = AsyncMock()
+        page.evaluate = AsyncMock(
+            return_value=[
+                {"title": None, "price": "0.00", "rating": "N/A", "reviews": "0"},
+                {
+                    "title": " Large Eggs ",
+                    "price": "$4.99",
+                    "rating": "4.5 out of 5 stars",
+                    "reviews": "1,024",
+                },
+            ]
+        )
+        locator = page.locator.return_value
+        locator.clear = AsyncMock()
+        locator.fill = AsyncMock()
+        locator.press = AsyncMock()
+
+        browser = AmazonFreshBrowser()
+        browser.page = page
+        options = await browser.search_and_get_options("Eggs")
+
+        self.assertEqual(len(options), 1)
+        # Index is the card's position on the page, used by add_specific_item
+        self.assertEqual(options[0]["index"], 1)
+        self.assertEqual(options[0]["title"], "Large Eggs")
+        self.assertEqual(options[0]["price"], 4.99)
+        self.assertEqual(options[0]["reviews"], "1,024")
+        page.evaluate.assert_awaited_once()
+        locator.nth.assert_not_called()
+
+    async def test_search_and_add_many_keeps_order(self):
+        """Test that parallel adds spread over the tab pool and keep input order."""
+        pages = [AsyncMock(), AsyncMock(), AsyncMock()]
+        browser = AmazonFreshBrowser()
+        browser.pages = pages
+        used = set()
+
+        async def fake_add(item_name, page=None):
+            used.add(id(page))
+            await asyncio.sleep(0)  # Yield so the other worker picks up items
+            return {"status": "ADDED", "price": float(len(item_name))}
+
+        with patch.object(browser, "search_and_add", side_effect=fake_add):
+            results = await browser.search_and_add_many(["Eggs", "Milk", "Bread"], concurrency=2)
+
+        self.assertEqual([r["price"] for r in results], [4.0, 4.0, 5.0])
+        # Only the first two tabs are used, and they stay open for the next batch
+        self.assertEqual(used, {id(pages[0]), id(pages[1])})
+        for page in pages:
+            page.close.assert_not_awaited()
+
+    async def test_search_and_add_many_stops_at_budget(self):
+        """Test that no new item is started once the added prices reach the budget."""
+        browser = AmazonFreshBrowser()
+        browser.pages = [AsyncMock()]
+
+        async def fake_add(item_name, page=None):
+            return {"status": "ADDED", "price": 6.0}
+
+        with patch.object(browser, "search_and_add", side_effect=fake_add) as mock_add:
+            results = await browser.search_and_add_many(["Eggs", "Milk", "Bread"], budget=10.0)
+
+        self.assertEqual([r["status"] for r in results], ["ADDED", "ADDED", "BUDGET"])
+        self.assertEqual(mock_add.await_count, 2)
+
+        with patch.object(browser, "search_and_add", side_effect=fake_add) as mock_add:
+            results = await browser.search_and_add_many(["Eggs"], budget=0.0)
+        self.assertEqual(results, [{"status": "BUDGET", "price": 0.0}])
+        mock_add.assert_not_awaited()
+
+    async def test_search_and_add_many_without_pool_uses_main_page(self):
+        """Test that an empty tab pool falls back to the main page."""
+        browser = AmazonFreshBrowser()
+        browser.page = AsyncMock()
+
+        with patch.object(
+            browser, "search_and_add", return_value={"status": "ADDED", "price": 2.0}
+        ) as mock_add:
+            results = await browser.search_and_add_many(["Eggs"])
+
+        self.assertEqual(results[0]["status"], "ADDED")
+        mock_add.assert_awaited_once_with("Eggs", page=browser.page)
+
+    async def test_close_saves_session_only_when_dirty(self):
+        """Test that close() writes the session file only after a navigation."""
+        browser = AmazonFreshBrowser()
+        browser.context = AsyncMock()
+        browser.context.storage_state.return_value = {"cookies": [], "origins": []}
+
+        with patch("browser.asyncio.to_thread", new_callable=AsyncMock) as mock_to_thread:
+            await browser.close()
+            mock_to_thread.assert_not_awaited()
+
+            browser.context = context = AsyncMock()
+            context.storage_state.return_value = {"cookies": [], "origins": []}
+            browser._session_dirty = True
+            await browser.close()
+            mock_to_thread.assert_awaited_once()
+        self.assertFalse(browser._session_dirty)
+        # Reset, so a later start() launches again instead of reusing closed pages
+        self.assertIsNone(browser.page)
+        self.assertIsNone(browser.context)
+        self.assertEqual(browser.pages, [])
+
+    def test_parse_price(self):
+        """Test price string parsing, including separators and junk input."""
         test_cases = [
             ("$12.99", 12.99),
             ("$5.00", 5.00),
             ("$100.50", 100.50),
             ("$1,234.56", 1234.56),
+            ("$3", 3.0),
+            ("", 0.0),
+            (None, 0.0),
+            ("N/A", 0.0),
         ]
 
         for price_str, expected in test_cases:
-            # Simulate the parsing logic from browser.py
-            cleaned = price_str.replace("$", "").replace(",", "").strip()
-            result = float(cleaned)
-            self.assertEqual(result, expected, f"Failed for {price_str}")
+            self.assertEqual(_parse_price(price_str), expected, f"Failed for {price_str}")
 
 
 if __name__ == "__main__":
@@ -4,8 +4,11 @@ Unit tests for database.py
 
 import json
 import os
+import sqlite3
 import tempfile
+import threading
 import unittest
+from unittest.mock import patch
 
 from database import DBManager
 
@@ -14,15 +17,12 @@ class TestDBManager(unittest.TestCase):
     """Test cases for DBManager class."""
 
     def setUp(self):
-        """Set up a temporary database for testing."""
-        self.temp_db = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
-        self.temp_db.close()
-        self.db = DBManager(self.temp_db.name)
+        """Set up an in-memory database for testing."""
+        self.db = DBManager(":memory:")
 
     def tearDown(self):
-        """Clean up the temporary database."""
-        self.db.conn.close()
-        os.unlink(self.temp_db.name)
+        """Close the in-memory database."""
+        self.db.close()
 
     def test_save_and_get_setting(self):
         """Test saving and retrieving settings."""
@@ -30,6 +30,27 @@ class TestDBManager(unittest.TestCase):
         result = self.db.get_setting("budget")
         self.assertEqual(result, "200.0")
 
+    def test_save_setting_updates_in_place(self):
+        """Test overwriting a setting keeps the original row."""
+        self.db.save_setting("budget", "100.0")
+        rowid = self.db.conn.execute("SELECT rowid FROM settings WHERE key='budget'").fetchone()[0]
+        self.db.save_setting("budget", "150.0")
+        row = self.db.conn.execute("SELECT rowid, value FROM settings WHERE key='budget'").fetchone()
+        self.assertEqual(row, (rowid, "150.0"))
+
+    def test_save_settings(self):
+        """Test saving several settings at once."""
+        self.db.save_setting("budget", "100.0")
+        self.db.save_settings({"budget": "250.0", "pantry": "Salt, Pepper"})
+        self.assertEqual(self.db.get_setting("budget"), "250.0")
+        self.assertEqual(self.db.get_setting("pantry"), "Salt, Pepper")
+
+    def test_get_settings(self):
+        """Test reading several settings at once, with defaults for missing keys."""
+        self.db.save_setting("budget", "150.0")
+        settings = self.db.get_settings({"budget": "200.0", "pantry": ""})
+        self.assertEqual(settings, {"budget": "150.0", "pantry": ""})
+
     def test_get_setting_default(self):
         """Test getting a non-existent setting returns default."""
         result = self.db.get_setting("nonexistent", "default_value")
@@ -50,12 +71,9 @@ class TestDBManager(unittest.TestCase):
     def test_get_recent_plans(self):
         """Test retrieving recent plans."""
         # Add multiple plans
-        for i in range(3):
-            self.db.save_plan(
-                f"Prompt {i}",
-                json.dumps({"schedule": []}),
-                [f"Item {i}"]
-            )
+        self.db.save_plans_bulk(
+            (f"Prompt {i}", json.dumps({"schedule": []}), [f"Item {i}"]) for i in range(3)
+        )
 
         plans = self.db.get_recent_plans(limit=2)
         self.assertEqual(len(plans), 2)
@@ -69,10 +87,33 @@ class TestDBManager(unittest.TestCase):
         plans = self.db.get_recent_plans()
         self.assertEqual(len(plans), 0)
 
+    def test_transaction_commits_once(self):
+        """Test that writes inside transaction() are committed together on exit."""
+        with self.db.transaction():
+            self.db.save_plan("Test", json.dumps({"schedule": []}), ["Eggs"])
+            self.db.save_setting("budget", "90.0")
+            self.assertTrue(self.db.conn.in_transaction)
+        self.assertFalse(self.db.conn.in_transaction)
+        self.assertEqual(self.db.get_setting("budget"), "90.0")
+        self.assertEqual(self.db.get_all_past_items(), "Eggs")
+
+    def test_transaction_rolls_back_on_error(self):
+        """Test that an exception inside transaction() discards its writes."""
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.db.save_plan("Test", json.dumps({"schedule": []}), ["Eggs"])
+                raise RuntimeError("boom")
+        self.assertEqual(self.db.get_recent_plans(), [])
+        self.assertEqual(self.db.get_all_past_items(), "")
+
     def test_get_all_past_items(self):
         """Test retrieving all unique past items."""
-        self.db.save_plan("Plan 1", json.dumps({"schedule": []}), ["Eggs", "Bread"])
-        self.db.save_plan("Plan 2", json.dumps({"schedule": []}), ["Eggs", "Milk"])
+        self.db.save_plans_bulk(
+            [
+                ("Plan 1", json.dumps({"schedule": []}), ["Eggs", "Bread"]),
+                ("Plan 2", json.dumps({"schedule": []}), ["Eggs", "Milk"]),
+            ]
+        )
 
         result = self.db.get_all_past_items()
         items = set(item.strip() for item in result.split(","))
@@ -80,6 +121,154 @@ class TestDBManager(unittest.TestCase):
         self.assertIn("Bread", items)
         self.assertIn("Milk", items)
 
+    def test_get_all_past_items_case_insensitive(self):
+        """Test that past items are de-duplicated ignoring case."""
+        self.db.save_plan("Plan 1", json.dumps({"schedule": []}), ["eggs"])
+        self.db.save_plan("Plan 2", json.dumps({"schedule": []}), ["Eggs "])
+
+        result = self.db.get_all_past_items()
+        self.assertEqual(len(result.split(",")), 1)
+
+    def test_get_all_past_items_cached_until_write(self):
+        """Test that past items are cached and refreshed after plan writes."""
+        self.db.save_plan("Plan 1", json.dumps({"schedule": []}), ["Eggs"])
+        self.assertEqual(self.db.get_all_past_items(), "Eggs")
+        with patch.object(self.db, "_reader") as mock_reader:
+            self.assertEqual(self.db.get_all_past_items(), "Eggs")
+            mock_reader.assert_not_called()
+
+        self.db.save_plan("Plan 2", json.dumps({"schedule": []}), ["Milk"])
+        self.assertEqual(self.db.get_all_past_items(), "Milk, Eggs")
+        self.db.delete_all_plans()
+        self.assertEqual(self.db.get_all_past_items(), "")
+
+    def test_delete_plan_removes_items(self):
+        """Test that deleting a plan cascades to its items."""
+        self.db.save_plan("Plan 1", json.dumps({"schedule": []}), ["Eggs"])
+        plan_id = self.db.get_recent_plans(limit=1)[0]["id"]
+        self.db.delete_plan(plan_id)
+        self.assertEqual(self.db.get_all_past_items(), "")
+
+    def test_get_recent_plans_skips_corrupt_lists(self):
+        """Test that rows with an unparsable shopping list are skipped, not raised."""
+        self.db.save_plan("Good", json.dumps({"schedule": []}), ["Eggs"])
+        self.db.conn.execute(
+            "INSERT INTO meal_plans (date, prompt, plan_json, shopping_list) VALUES (?, ?, ?, ?)",
+            ("2024-01-01 00:00", "Bad", "{}", "not json"),
+        )
+        self.db.conn.commit()
+        plans = self.db.get_recent_plans()
+        self.assertEqual([p["prompt"] for p in plans], ["Good"])
+
+    def test_save_plan_skips_blank_and_non_string_items(self):
+        """Test that editor rows without a name are not stored as past items."""
+        self.db.save_plan("Plan 1", json.dumps({"schedule": []}), ["Eggs", None, " "])
+        self.assertEqual(self.db.get_all_past_items(), "Eggs")
+
+    def test_save_plan_rolls_back_on_error(self):
+        """Test that a failed save leaves no orphan plan behind."""
+        with patch.object(DBManager, "_SAVE_PLAN_ITEM_SQL", "INSERT INTO missing VALUES (?, ?)"):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.db.save_plan("Bad", json.dumps({"schedule": []}), ["Eggs"])
+        self.assertFalse(self.db.conn.in_transaction)
+        self.db.save_setting("budget", "90.0")
+        self.assertEqual([p["prompt"] for p in self.db.get_recent_plans()], [])
+
+    def test_get_recent_plans_uses_rowid_order(self):
+        """Test that the recent-plans query needs no sort step."""
+        plan = self.db.conn.execute(
+            "EXPLAIN QUERY PLAN " + DBManager._GET_RECENT_SQL, (5,)
+        ).fetchall()
+        self.assertFalse(any("TEMP B-TREE" in row[-1] for row in plan))
+
+    def test_migrate_backfills_plan_items(self):
+        """Test that plans saved before plan_items existed are backfilled."""
+        self.db.conn.execute(
+            "INSERT INTO meal_plans (date, prompt, plan_json, shopping_list) VALUES (?, ?, ?, ?)",
+            ("2024-01-01 00:00", "Old", "{}", json.dumps(["Rice", "Beans"])),
+        )
+        self.db.conn.execute("PRAGMA user_version = 0")
+        self.db.conn.commit()
+
+        self.db.migrate()
+
+        items = set(item.strip() for item in self.db.get_all_past_items().split(","))
+        self.assertEqual(items, {"Rice", "Beans"})
+
+    def test_migrate_skips_malformed_legacy_lists(self):
+        """Test that legacy rows with null, numeric or mixed lists do not stop the backfill."""
+        for list_str in ("null", "7", json.dumps(["Rice", None, 3]), "not json"):
+            self.db.conn.execute(
+                "INSERT INTO meal_plans (date, prompt, plan_json, shopping_list) VALUES (?, ?, ?, ?)",
+                ("2024-01-01 00:00", "Old", "{}", list_str),
+            )
+        self.db.conn.execute("PRAGMA user_version = 0")
+        self.db.conn.commit()
+
+        self.db.migrate()
+
+        self.assertEqual(self.db.get_all_past_items(), "Rice")
+
+
+class TestDBManagerOnDisk(unittest.TestCase):
+    """Test cases that need a database file: journaling, readers and maintenance."""
+
+    def setUp(self):
+        """Set up a temporary database file for testing."""
+        self.temp_db = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
+        self.temp_db.close()
+        self.db = DBManager(self.temp_db.name)
+
+    def tearDown(self):
+        """Clean up the temporary database."""
+        self.db.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.temp_db.name + suffix):
+                os.unlink(self.temp_db.name + suffix)
+
+    def test_reads_share_pooled_read_only_connections(self):
+        """Test that reads from any thread reuse pooled read-only connections."""
+        self.db.save_setting("budget", "120.0")
+        workers = [
+            threading.Thread(target=self.db.get_setting, args=("budget",)) for _ in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+            worker.join()
+        self.assertEqual(self.db.get_setting("budget"), "120.0")
+        # Sequential reads on fresh threads all reuse one connection
+        self.assertEqual(len(self.db._readers), 1)
+
+        with self.db._reader() as first, self.db._reader() as second:
+            self.assertIsNot(first, second)
+            self.assertIsNot(first, self.db.conn)
+            with self.assertRaises(sqlite3.OperationalError):
+                first.execute("DELETE FROM settings")
+
+        readers = list(self.db._readers)
+        self.db.close()
+        for reader in readers:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                reader.execute("SELECT 1")
+
+    def test_wal_and_incremental_vacuum_enabled(self):
+        """Test that new databases use WAL and incremental auto-vacuum."""
+        self.assertEqual(self.db.conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(self.db.conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+        # synchronous=NORMAL is 1, temp_store=MEMORY is 2
+        self.assertEqual(self.db.conn.execute("PRAGMA synchronous").fetchone()[0], 1)
+        self.assertEqual(self.db.conn.execute("PRAGMA temp_store").fetchone()[0], 2)
+        self.assertEqual(self.db.conn.execute("PRAGMA cache_size").fetchone()[0], -20000)
+        self.assertEqual(self.db.conn.execute("PRAGMA mmap_size").fetchone()[0], 268435456)
+        # sqlite3.connect's default timeout=5.0 is the busy timeout
+        self.assertEqual(self.db.conn.execute("PRAGMA busy_timeout").fetchone()[0], 5000)
+
+    def test_maintenance(self):
+        """Test that maintenance runs cleanly and keeps data intact."""
+        self.db.save_plan("Test", json.dumps({"schedule": []}), ["Item"])
+        self.db.maintenance()
+        self.assertEqual(len(self.db.get_recent_plans()), 1)
+
 
 if __name__ == "__main__":
     unittest.main()
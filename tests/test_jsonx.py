@@ -0,0 +1,32 @@
+"""
+Unit tests for jsonx.py
+"""
+
+import unittest
+
+import jsonx
+
+
+class TestJsonx(unittest.TestCase):
+    """Test cases for the jsonx helpers."""
+
+    def test_round_trip(self):
+        """Test that dumps output parses back to the same object."""
+        data = {"schedule": [{"day": "Monday", "nutrition": {"calories": 2000}}]}
+        dumped = jsonx.dumps(data)
+        self.assertIsInstance(dumped, str)
+        self.assertEqual(jsonx.loads(dumped), data)
+
+    def test_loads_bytes(self):
+        """Test that loads accepts bytes as well as str."""
+        self.assertEqual(jsonx.loads(b'["Eggs", "Milk"]'), ["Eggs", "Milk"])
+
+    def test_invalid_json_raises_value_error(self):
+        """Test that invalid input raises JSONDecodeError (a ValueError)."""
+        with self.assertRaises(jsonx.JSONDecodeError):
+            jsonx.loads("not json")
+        self.assertTrue(issubclass(jsonx.JSONDecodeError, ValueError))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,9 @@ Unit tests for pdf_generator.py
 """
 
 import json
+import re
 import unittest
+import zlib
 
 from pdf_generator import MealPlanPDF, generate_pdf
 
@@ -28,12 +30,17 @@ class TestMealPlanPDF(unittest.TestCase):
         result = pdf.clean_text("Café ñoño")
         self.assertIsInstance(result, str)
 
+        # Test non-string values and characters outside latin-1
+        self.assertEqual(pdf.clean_text(["2 Eggs", "Salt"]), "['2 Eggs', 'Salt']")
+        self.assertEqual(pdf.clean_text("Tea 🍵"), "Tea ?")
+
 
 class TestGeneratePDF(unittest.TestCase):
     """Test cases for generate_pdf function."""
 
-    def test_generate_pdf_basic(self):
-        """Test basic PDF generation."""
+    @classmethod
+    def setUpClass(cls):
+        """Render the full sample plan once for the tests that inspect it."""
         meal_plan = json.dumps({
             "schedule": [
                 {
@@ -56,37 +63,57 @@ class TestGeneratePDF(unittest.TestCase):
                 }
             ]
         })
-        
         shopping_list = ["Eggs", "Butter", "Chicken", "Lettuce", "Steak", "Salt"]
-        
-        result = generate_pdf(meal_plan, shopping_list)
-        
-        # Check that it returns bytes
-        self.assertIsInstance(result, bytes)
-        
-        # Check that it's a valid PDF (starts with PDF header)
-        self.assertTrue(result.startswith(b"%PDF"))
+        cls.pdf_bytes = generate_pdf(meal_plan, shopping_list)
+        # fpdf2 deflates each page's content stream; keep the text operators
+        cls.page_streams = [
+            zlib.decompress(m.group(1)).decode("latin-1")
+            for m in re.finditer(rb"stream\r?\n(.*?)\r?\nendstream", cls.pdf_bytes, re.S)
+        ]
 
-    def test_generate_pdf_empty_shopping_list(self):
-        """Test PDF generation with empty shopping list."""
-        meal_plan = json.dumps({"schedule": []})
-        shopping_list = []
-        
-        result = generate_pdf(meal_plan, shopping_list)
-        
+    def assertIsPDF(self, result):
+        """Assert that result is the bytes of a PDF document."""
         self.assertIsInstance(result, bytes)
         self.assertTrue(result.startswith(b"%PDF"))
 
-    def test_generate_pdf_invalid_json(self):
-        """Test PDF generation with invalid JSON."""
-        meal_plan = "invalid json"
-        shopping_list = ["Item"]
-        
-        # Should not crash, just generate PDF with shopping list
-        result = generate_pdf(meal_plan, shopping_list)
-        
-        self.assertIsInstance(result, bytes)
-        self.assertTrue(result.startswith(b"%PDF"))
+    def test_generate_pdf_basic(self):
+        """Test basic PDF generation."""
+        self.assertIsPDF(self.pdf_bytes)
+
+    def test_generate_pdf_page_layout(self):
+        """Test that the shopping list gets one page and each day its own page."""
+        self.assertEqual(len(self.page_streams), 2)
+        self.assertIn("(Master Shopping List)", self.page_streams[0])
+        self.assertIn("(Monday)", self.page_streams[1])
+
+    def test_generate_pdf_shopping_list(self):
+        """Test that every shopping item is printed as a checkbox label."""
+        for item in ["Eggs", "Butter", "Chicken", "Lettuce", "Steak", "Salt"]:
+            self.assertIn(f"([ ] {item})", self.page_streams[0])
+
+    def test_generate_pdf_meals(self):
+        """Test that each meal's title, ingredients and steps are printed."""
+        day_page = self.page_streams[1]
+        for text in (
+            "Breakfast: Scrambled Eggs",
+            "Lunch: Chicken Salad",
+            "Dinner: Steak",
+            "Ing: 8oz Steak, Salt",
+            "Steps: Season and grill steak.",
+        ):
+            self.assertIn(text, day_page)
+
+    def test_generate_pdf_edge_cases(self):
+        """Test that empty and invalid input still produce a PDF."""
+        cases = {
+            # Empty shopping list and schedule
+            "empty": (json.dumps({"schedule": []}), []),
+            # Should not crash, just generate PDF with shopping list
+            "invalid_json": ("invalid json", ["Item"]),
+        }
+        for name, (meal_plan, shopping_list) in cases.items():
+            with self.subTest(name):
+                self.assertIsPDF(generate_pdf(meal_plan, shopping_list))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,129 @@
+"""
+Unit tests for ui.py
+"""
+
+import json
+import unittest
+from unittest.mock import patch
+
+from ui import (
+    build_meal_cards,
+    build_nutrition_df,
+    day_details,
+    meal_cards,
+    nutrition_df,
+    parse_plan,
+    render_plan_ui,
+)
+
+
+class TestParsePlan(unittest.TestCase):
+    """Test cases for parse_plan."""
+
+    def test_parse_plan_memoized(self):
+        """Test that the same JSON string is parsed only once."""
+        plan_json = json.dumps({"schedule": [{"day": "Monday"}]})
+        first = parse_plan(plan_json)
+        self.assertEqual(first, {"schedule": [{"day": "Monday"}]})
+        self.assertIs(parse_plan(plan_json), first)
+
+    def test_parse_plan_invalid_json(self):
+        """Test that invalid JSON raises a ValueError."""
+        with self.assertRaises(ValueError):
+            parse_plan("not json")
+
+
+class TestMealCards(unittest.TestCase):
+    """Test cases for build_meal_cards and meal_cards."""
+
+    def test_build_meal_cards(self):
+        """Test that dict and plain-text meals both render as cards."""
+        schedule = [{"day": "Monday", "breakfast": {"title": "Eggs"}, "lunch": "Salad"}]
+        cards = build_meal_cards(schedule)
+        self.assertEqual(len(cards), 1)
+        row = cards[0]
+        self.assertTrue(row.startswith('<div class="meal-row">'))
+        self.assertEqual(row.count('class="meal-card"'), 3)
+        self.assertLess(row.index("Breakfast"), row.index("Lunch"))
+        self.assertLess(row.index("Lunch"), row.index("Dinner"))
+        self.assertIn(">Eggs<", row)
+        self.assertIn(">Salad<", row)
+        self.assertIn(">None<", row)
+
+    def test_meal_cards_memoized(self):
+        """Test that cards for the same plan JSON are built only once."""
+        plan_json = json.dumps({"schedule": [{"day": "Monday", "lunch": "Soup"}]})
+        first = meal_cards(plan_json)
+        self.assertIn(">Soup<", first[0])
+        self.assertIs(meal_cards(plan_json), first)
+
+    def test_day_details_memoized(self):
+        """Test that each day is serialized once per plan JSON."""
+        day = {"day": "Monday", "lunch": {"title": "Soup"}}
+        plan_json = json.dumps({"schedule": [day]})
+        first = day_details(plan_json)
+        self.assertEqual([json.loads(d) for d in first], [day])
+        self.assertIs(day_details(plan_json), first)
+
+
+class TestBuildNutritionDF(unittest.TestCase):
+    """Test cases for build_nutrition_df."""
+
+    def test_columns_and_index(self):
+        """Test that days become the index and macros the columns."""
+        schedule = [
+            {"day": "Monday", "nutrition": {"calories": 2000, "protein_g": 150, "carbs_g": 200, "fat_g": 70}},
+            {"day": "Tuesday", "nutrition": {"calories": 1800, "protein_g": 140, "carbs_g": 180, "fat_g": 60}},
+        ]
+        df = build_nutrition_df(schedule)
+        self.assertEqual(list(df.index), ["Monday", "Tuesday"])
+        self.assertEqual(list(df.columns), ["Calories", "Protein", "Carbs", "Fat"])
+        self.assertEqual(df.loc["Tuesday", "Calories"], 1800)
+
+    def test_missing_and_malformed_values(self):
+        """Test that missing, null and string values are coerced to numbers."""
+        schedule = [
+            {"day": "Monday", "nutrition": {"calories": "2100", "protein_g": None}},
+            {"day": "Tuesday"},
+        ]
+        df = build_nutrition_df(schedule)
+        self.assertEqual(df.loc["Monday", "Calories"], 2100)
+        self.assertEqual(df.loc["Monday", "Protein"], 0)
+        self.assertEqual(df.loc["Tuesday"].sum(), 0)
+
+    def test_keeps_fractions_and_large_values(self):
+        """Test that fractional grams survive and large values do not wrap."""
+        schedule = [{"day": "Monday", "nutrition": {"calories": 40000, "protein_g": 12.5}}]
+        df = build_nutrition_df(schedule)
+        self.assertEqual(df.loc["Monday", "Calories"], 40000)
+        self.assertEqual(df.loc["Monday", "Protein"], 12.5)
+        self.assertTrue((df.dtypes == "float32").all())
+
+    def test_nutrition_df_memoized(self):
+        """Test that the nutrition table for the same plan JSON is built only once."""
+        plan_json = json.dumps({"schedule": [{"day": "Monday", "nutrition": {"calories": 1900}}]})
+        first = nutrition_df(plan_json)
+        self.assertEqual(first.loc["Monday", "Calories"], 1900)
+        self.assertIs(nutrition_df(plan_json), first)
+
+
+class TestRenderPlanUI(unittest.TestCase):
+    """Test cases for render_plan_ui's handling of empty and malformed plans."""
+
+    def test_empty_schedule_draws_nothing(self):
+        """Test that a plan with no days returns before drawing any element."""
+        with patch("ui.st") as mock_st:
+            render_plan_ui(json.dumps({"schedule": []}))
+        self.assertEqual(mock_st.method_calls, [])
+
+    def test_invalid_plans_show_error(self):
+        """Test that unparsable JSON and malformed days show one error instead of raising."""
+        for plan_json in ("not json", json.dumps({"schedule": [{"lunch": "Soup"}]})):
+            with patch("ui.st") as mock_st:
+                render_plan_ui(plan_json)
+            mock_st.error.assert_called_once()
+            mock_st.subheader.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
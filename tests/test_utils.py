@@ -0,0 +1,84 @@
+"""
+Unit tests for utils.py
+"""
+
+import asyncio
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from utils import get_event_loop, run_async
+
+
+class TestRunAsync(unittest.TestCase):
+    """Test cases for run_async."""
+
+    def test_returns_coroutine_result(self):
+        """Test that run_async returns what the coroutine returns."""
+
+        async def work():
+            await asyncio.sleep(0)
+            return 42
+
+        self.assertEqual(run_async(work()), 42)
+
+    def test_reuses_one_loop(self):
+        """Test that every call runs on the same long-lived loop."""
+
+        async def current_loop():
+            return asyncio.get_running_loop()
+
+        first = run_async(current_loop())
+        second = run_async(current_loop())
+        self.assertIs(first, second)
+        self.assertIs(first, get_event_loop())
+
+    def test_propagates_exceptions(self):
+        """Test that exceptions raised in the coroutine reach the caller."""
+
+        async def fail():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            run_async(fail())
+
+    def test_concurrent_runs_keep_their_own_context(self):
+        """Test that runs from two sessions overlap and each sees its caller's context."""
+        contexts = {"first": MagicMock(), "second": MagicMock()}
+        started, seen = set(), {}
+
+        async def work(name):
+            started.add(name)
+            # Only finishes once the other run has started, so a lock would deadlock
+            for _ in range(200):
+                if len(started) == 2:
+                    break
+                await asyncio.sleep(0.005)
+            seen[name] = get_script_run_ctx(suppress_warning=True)
+            return len(started)
+
+        results = {}
+        with patch(
+            "utils.get_script_run_ctx",
+            side_effect=lambda: contexts[threading.current_thread().name],
+        ):
+            threads = [
+                threading.Thread(
+                    target=lambda n=name: results.update({n: run_async(work(n))}), name=name
+                )
+                for name in contexts
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(results, {"first": 2, "second": 2})
+        self.assertIs(seen["first"], contexts["first"])
+        self.assertIs(seen["second"], contexts["second"])
+
+
+if __name__ == "__main__":
+    unittest.main()
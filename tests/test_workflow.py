@@ -0,0 +1,51 @@
+"""
+Unit tests for workflow.py
+"""
+
+import sqlite3
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from langgraph.checkpoint.base import empty_checkpoint
+
+from workflow import PersistentSaver
+
+
+class TestPersistentSaver(unittest.IsolatedAsyncioTestCase):
+    """Test cases for PersistentSaver."""
+
+    def setUp(self):
+        """Set up an in-memory checkpointer."""
+        self.saver = PersistentSaver(sqlite3.connect(":memory:", check_same_thread=False))
+
+    def _put(self, thread_id, age_hours=0):
+        """Save an empty checkpoint for thread_id, aged by age_hours, and return its config."""
+        checkpoint = empty_checkpoint()
+        ts = datetime.now(timezone.utc) - timedelta(hours=age_hours)
+        checkpoint["ts"] = ts.isoformat()
+        config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+        return self.saver.put(config, checkpoint, {}, {})
+
+    async def test_async_round_trip(self):
+        """Test that the async API reads what the sync API wrote."""
+        config = self._put("thread-a")
+        result = await self.saver.aget_tuple(config)
+        self.assertIsNotNone(result)
+        items = [item async for item in self.saver.alist(config)]
+        self.assertEqual(len(items), 1)
+
+    def test_prune_removes_stale_threads(self):
+        """Test that prune drops only threads older than the cutoff."""
+        self._put("stale", age_hours=48)
+        self._put("fresh")
+
+        self.saver.prune(max_age_hours=24)
+
+        threads = {
+            item.config["configurable"]["thread_id"] for item in self.saver.list(None)
+        }
+        self.assertEqual(threads, {"fresh"})
+
+
+if __name__ == "__main__":
+    unittest.main()
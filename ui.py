@@ -2,10 +2,13 @@
 UI components and styles for the Amazon Fresh Fetch Agent.
 """
 
-import json
+from functools import lru_cache
+
 import pandas as pd
 import streamlit as st
 
+import jsonx
+
 STREAMLIT_STYLE = """
 <style>
     .meal-card {
@@ -19,6 +22,8 @@ STREAMLIT_STYLE = """
     }
     .meal-body { font-size: 1rem; color: #4f4f4f; line-height: 1.5; }
     .icon { margin-right: 8px; }
+    .meal-row { display: flex; flex-wrap: wrap; gap: 1rem; }
+    .meal-row > .meal-card { flex: 1 1 200px; }
     [data-testid="stSidebar"] {
         min-width: 250px;
         max-width: 500px;
@@ -26,64 +31,182 @@ STREAMLIT_STYLE = """
 </style>
 """
 
+# (plan key, icon, label) for the three cards shown per day
+MEAL_SLOTS = (
+    ("breakfast", "🥞", "Breakfast"),
+    ("lunch", "🥗", "Lunch"),
+    ("dinner", "🍳", "Dinner"),
+)
+
+MEAL_ROW_HTML = """<div class="meal-row">{cards}</div>"""
+MEAL_CARD_HTML = """<div class="meal-card"><div class="meal-header"><span class="icon">{icon}</span> {label}</div><div class="meal-body">{title}</div></div>"""
+
+
+@lru_cache(maxsize=16)
+def parse_plan(plan_json):
+    """
+    Parse a meal plan JSON string, memoized across reruns.
+
+    The same dict is returned for repeated calls, so callers must not mutate it.
+
+    Args:
+        plan_json (str): The JSON string of the meal plan.
+
+    Returns:
+        dict: The parsed meal plan.
+    """
+    return jsonx.loads(plan_json)
+
+
+def get_title(meal):
+    """
+    Get the display title of a meal entry.
+
+    Args:
+        meal (dict | str): A meal from the plan, either a dict or plain text.
+
+    Returns:
+        str: The meal's title, or the entry itself as text.
+    """
+    return meal.get("title", str(meal)) if isinstance(meal, dict) else str(meal)
+
+
+def build_meal_cards(schedule):
+    """
+    Build one row of breakfast, lunch and dinner cards for each day.
+
+    Args:
+        schedule (list): The "schedule" list of a parsed meal plan.
+
+    Returns:
+        tuple: One HTML string per day, holding all three cards.
+    """
+    return tuple(
+        MEAL_ROW_HTML.format(
+            cards="".join(
+                MEAL_CARD_HTML.format(icon=icon, label=label, title=get_title(day.get(key)))
+                for key, icon, label in MEAL_SLOTS
+            )
+        )
+        for day in schedule
+    )
+
+
+@lru_cache(maxsize=16)
+def meal_cards(plan_json):
+    """
+    Build the meal card HTML for a plan, memoized across reruns.
+
+    Args:
+        plan_json (str): The JSON string of the meal plan.
+
+    Returns:
+        tuple: One HTML string per day, holding all three cards.
+    """
+    return build_meal_cards(parse_plan(plan_json).get("schedule", []))
+
+
+@lru_cache(maxsize=16)
+def day_details(plan_json):
+    """
+    Serialize each day of a plan for st.json, memoized across reruns.
+
+    st.json passes a string through as-is instead of re-dumping a dict.
+
+    Args:
+        plan_json (str): The JSON string of the meal plan.
+
+    Returns:
+        tuple: One JSON string per day.
+    """
+    return tuple(jsonx.dumps(day) for day in parse_plan(plan_json).get("schedule", []))
+
+
+def build_nutrition_df(schedule):
+    """
+    Build the per-day nutrition table used by the charts.
+
+    Args:
+        schedule (list): The "schedule" list of a parsed meal plan.
+
+    Returns:
+        pd.DataFrame: Calories, Protein, Carbs and Fat indexed by Day.
+    """
+    nutrition = [day.get("nutrition") or {} for day in schedule]
+    df_nutri = pd.DataFrame(
+        {
+            "Calories": [n.get("calories", 0) for n in nutrition],
+            "Protein": [n.get("protein_g", 0) for n in nutrition],
+            "Carbs": [n.get("carbs_g", 0) for n in nutrition],
+            "Fat": [n.get("fat_g", 0) for n in nutrition],
+        },
+        index=pd.Index([day["day"] for day in schedule], name="Day"),
+    )
+    # LLM output may hold numeric strings or nulls; coerce before downcasting.
+    # float32 keeps fractional grams and cannot wrap like a small int type.
+    return df_nutri.apply(pd.to_numeric, errors="coerce").fillna(0).astype("float32")
+
+
+@lru_cache(maxsize=16)
+def nutrition_df(plan_json):
+    """
+    Build the nutrition table for a plan, memoized across reruns.
+
+    The same DataFrame is returned for repeated calls, so callers must not mutate it.
+
+    Args:
+        plan_json (str): The JSON string of the meal plan.
+
+    Returns:
+        pd.DataFrame: Calories, Protein, Carbs and Fat indexed by Day.
+    """
+    return build_nutrition_df(parse_plan(plan_json).get("schedule", []))
+
+
 def render_plan_ui(plan_json):
     """
     Render the meal plan in the Streamlit UI.
 
     Args:
-        plan_json (str): The JSON string of the meal plan.
+        plan_json (str | dict): The meal plan as a JSON string or parsed dict.
     """
     try:
-        plan_data = json.loads(plan_json)
-        schedule = plan_data.get("schedule", [])
-        if schedule:
-            nutri_data = []
-            for day in schedule:
-                n = day.get("nutrition", {})
-                nutri_data.append(
-                    {
-                        "Day": day["day"],
-                        "Calories": n.get("calories", 0),
-                        "Protein": n.get("protein_g", 0),
-                        "Carbs": n.get("carbs_g", 0),
-                        "Fat": n.get("fat_g", 0),
-                    }
-                )
-            if nutri_data:
-                df_nutri = pd.DataFrame(nutri_data)
-                st.subheader("📊 Nutritional Analysis")
-                c1, c2 = st.columns(2)
-                with c1:
-                    st.bar_chart(df_nutri.set_index("Day")["Calories"], color="#ff4b4b")
-                with c2:
-                    st.bar_chart(df_nutri.set_index("Day")[["Protein", "Carbs", "Fat"]])
-
-            st.subheader("📅 Weekly Plan")
-            tabs = st.tabs([day["day"] for day in schedule])
-            for tab, day_info in zip(tabs, schedule):
-                with tab:
-                    col1, col2, col3 = st.columns(3)
-
-                    def get_title(m):
-                        return m.get("title", str(m)) if isinstance(m, dict) else str(m)
-
-                    with col1:
-                        st.markdown(
-                            f"""<div class="meal-card"><div class="meal-header"><span class="icon">🥞</span> Breakfast</div><div class="meal-body">{get_title(day_info.get('breakfast'))}</div></div>""",
-                            unsafe_allow_html=True,
-                        )
-                    with col2:
-                        st.markdown(
-                            f"""<div class="meal-card"><div class="meal-header"><span class="icon">🥗</span> Lunch</div><div class="meal-body">{get_title(day_info.get('lunch'))}</div></div>""",
-                            unsafe_allow_html=True,
-                        )
-                    with col3:
-                        st.markdown(
-                            f"""<div class="meal-card"><div class="meal-header"><span class="icon">🍳</span> Dinner</div><div class="meal-body">{get_title(day_info.get('dinner'))}</div></div>""",
-                            unsafe_allow_html=True,
-                        )
-
-                    with st.expander("👨‍🍳 View Cooking Instructions"):
-                        st.json(day_info)
-    except Exception as e:
+        plan_data = plan_json if isinstance(plan_json, dict) else parse_plan(plan_json)
+        schedule = plan_data.get("schedule") or []
+    except (jsonx.JSONDecodeError, TypeError, AttributeError) as e:
+        st.error(f"Error rendering plan: {e}")
+        return
+    if not schedule:
+        return
+
+    # Malformed LLM output (a day without "day", a non-dict entry) fails here,
+    # before any element is drawn
+    try:
+        if isinstance(plan_json, dict):
+            df_nutri = build_nutrition_df(schedule)
+            cards = build_meal_cards(schedule)
+            details = schedule
+        else:
+            df_nutri = nutrition_df(plan_json)
+            cards = meal_cards(plan_json)
+            details = day_details(plan_json)
+        day_names = [day["day"] for day in schedule]
+    except (KeyError, TypeError, AttributeError) as e:
         st.error(f"Error rendering plan: {e}")
+        return
+
+    st.subheader("📊 Nutritional Analysis")
+    c1, c2 = st.columns(2)
+    with c1:
+        st.bar_chart(df_nutri["Calories"], color="#ff4b4b")
+    with c2:
+        st.bar_chart(df_nutri[["Protein", "Carbs", "Fat"]])
+
+    st.subheader("📅 Weekly Plan")
+    tabs = st.tabs(day_names)
+    for tab, day_cards, day_info in zip(tabs, cards, details):
+        with tab:
+            st.markdown(day_cards, unsafe_allow_html=True)
+
+            with st.expander("👨‍🍳 View Cooking Instructions"):
+                st.json(day_info)
@@ -2,27 +2,112 @@
 Utility functions for the Amazon Fresh Fetch Agent.
 """
 
+import asyncio
+import atexit
+import contextvars
 import os
+import threading
+from functools import lru_cache
+
 import streamlit as st
+from dotenv import load_dotenv
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+
+try:
+    import uvloop
+
+    new_event_loop = uvloop.new_event_loop
+except ImportError:  # uvloop is not available on Windows
+    new_event_loop = asyncio.new_event_loop
+
+# The Streamlit context of the asyncio task currently running on the loop
+_SCRIPT_RUN_CTX = contextvars.ContextVar("script_run_ctx", default=None)
+
+
+class _LoopThread(threading.Thread):
+    """
+    Event loop thread that keeps a Streamlit context per asyncio task.
+
+    Streamlit looks the context up as an attribute of the current thread. On
+    this thread the attribute is backed by a ContextVar, so concurrent
+    run_async calls from different sessions each see their own context
+    instead of whichever session attached last.
+    """
+
+
+setattr(
+    _LoopThread,
+    SCRIPT_RUN_CONTEXT_ATTR_NAME,
+    property(lambda self: _SCRIPT_RUN_CTX.get(), lambda self, ctx: _SCRIPT_RUN_CTX.set(ctx)),
+)
+
+
+@lru_cache(maxsize=1)
+def load_env():
+    """Load variables from the .env file once per process."""
+    load_dotenv()
+
 
 def get_api_key():
-    """Get API key from Environment OR Sidebar"""
-    api_key = os.getenv("GOOGLE_API_KEY")
-    
-    if not api_key:
+    """
+    Get the API key from the environment or the sidebar.
+
+    The key is kept in this session's state, so entering it takes effect in the
+    same run and is never shared with other sessions through os.environ.
+
+    Returns:
+        str: The API key. The run is stopped until one is available.
+    """
+    if "api_key" not in st.session_state:
+        st.session_state.api_key = os.getenv("GOOGLE_API_KEY")
+
+    if not st.session_state.api_key:
         # If no .env file, show an input box in the sidebar
         with st.sidebar:
             st.divider()
             st.warning("🔑 API Key Required")
             api_key = st.text_input(
-                "Enter Gemini API Key:", 
-                type="password", 
+                "Enter Gemini API Key:",
+                type="password",
                 help="Get one at aistudio.google.com"
             )
-            if api_key:
-                os.environ["GOOGLE_API_KEY"] = api_key # Set for this session
-                st.success("Key Accepted!")
-                st.rerun() # Rerun to ensure key is picked up
-            else:
-                st.stop() # Stop execution until key is provided
-    return api_key
+            if not api_key:
+                st.stop()  # Stop execution until key is provided
+            st.session_state.api_key = api_key
+            st.success("Key Accepted!")
+    return st.session_state.api_key
+
+
+@st.cache_resource
+def get_event_loop():
+    """Start one background event loop (uvloop when installed) and return it."""
+    loop = new_event_loop()
+    _LoopThread(target=loop.run_forever, name="agent-loop", daemon=True).start()
+    # Ask the loop to stop at interpreter exit rather than leaving it spinning
+    atexit.register(loop.call_soon_threadsafe, loop.stop)
+    return loop
+
+
+def run_async(coro):
+    """
+    Run a coroutine on the shared event loop and wait for its result.
+
+    The loop outlives reruns, so Playwright objects created on it stay usable
+    and no loop is built or torn down per button click. Each call runs as its
+    own task with the caller's Streamlit context, so sessions run side by side.
+
+    Args:
+        coro (Coroutine): The coroutine to run.
+
+    Returns:
+        Any: The coroutine's return value.
+    """
+    ctx = get_script_run_ctx()
+
+    async def _with_ctx():
+        # Sets this task's copy of the context only; see _LoopThread
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return await coro
+
+    return asyncio.run_coroutine_threadsafe(_with_ctx(), get_event_loop()).result()
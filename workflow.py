@@ -2,8 +2,12 @@
 LangGraph workflow definition for Amazon Fresh Fetch Agent.
 """
 
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
 import streamlit as st
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
 from langgraph.graph import END, StateGraph
 
 from agent import (
@@ -14,7 +18,67 @@ from agent import (
     planner_node,
     shopper_node,
 )
-from browser import AmazonFreshBrowser
+from config import CHECKPOINT_DB, CHECKPOINT_MAX_AGE_HOURS
+
+
+class PersistentSaver(SqliteSaver):
+    """
+    SQLite checkpointer that also serves the async graph API.
+
+    SqliteSaver only implements the sync interface. Checkpoint reads and writes
+    are local and fast, so the async methods simply delegate to the sync ones.
+    """
+
+    async def aget_tuple(self, config):
+        return self.get_tuple(config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return self.delete_thread(thread_id)
+
+    def prune(self, max_age_hours=CHECKPOINT_MAX_AGE_HOURS):
+        """
+        Delete every thread whose latest checkpoint is older than max_age_hours.
+
+        Args:
+            max_age_hours (float): Age after which a thread is discarded.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=max_age_hours)
+        latest = {}
+        for item in list(self.list(None)):
+            thread_id = item.config["configurable"]["thread_id"]
+            ts = datetime.fromisoformat(item.checkpoint["ts"])
+            if thread_id not in latest or ts > latest[thread_id]:
+                latest[thread_id] = ts
+        for thread_id, ts in latest.items():
+            if ts < cutoff:
+                self.delete_thread(thread_id)
+
+
+def create_checkpointer(db_name=CHECKPOINT_DB):
+    """
+    Open the on-disk checkpointer and prune stale threads in the background.
+
+    Args:
+        db_name (str): The checkpoint database file. Defaults to CHECKPOINT_DB.
+
+    Returns:
+        PersistentSaver: The checkpointer.
+    """
+    conn = sqlite3.connect(db_name, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    saver = PersistentSaver(conn)
+    threading.Thread(target=saver.prune, daemon=True).start()
+    return saver
 
 
 def create_workflow():
@@ -38,12 +102,41 @@ def create_workflow():
     workflow.add_edge("checkout", END)
     
     return workflow.compile(
-        checkpointer=MemorySaver(), interrupt_before=["shopper", "checkout"]
+        checkpointer=create_checkpointer(), interrupt_before=["shopper", "checkout"]
     )
 
 
+@st.cache_resource
+def get_graph_app():
+    """
+    Return the compiled workflow, shared by every session in this process.
+
+    Per-session progress is kept apart by the run config's thread_id, which the
+    app seeds with a fresh uuid for each session.
+
+    Returns:
+        CompiledGraph: The compiled state graph.
+    """
+    return create_workflow()
+
+
+@st.cache_resource
+def get_browser():
+    """
+    Return the browser tool, shared by every session in this process.
+
+    Nothing is launched until the shopper first calls start(). Playwright is
+    imported here, so loading this module does not pull it in.
+
+    Returns:
+        AmazonFreshBrowser: The browser tool.
+    """
+    from browser import AmazonFreshBrowser
+
+    return AmazonFreshBrowser()
+
+
 def init_session_state():
-    """Initialize the session state with the workflow and browser tool."""
-    if "graph_app" not in st.session_state:
-        st.session_state.graph_app = create_workflow()
-        st.session_state.browser_tool = AmazonFreshBrowser()
+    """Attach the shared browser tool to this session."""
+    if "browser_tool" not in st.session_state:
+        st.session_state.browser_tool = get_browser()